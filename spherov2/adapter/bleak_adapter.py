@@ -1,46 +1,174 @@
 import asyncio
 import threading
+from concurrent import futures
 
 import bleak
 
 
+class AsyncBleakAdapter:
+    """Adapter running on the caller's event loop, used by toys in ``async with``. Unlike :class:`BleakAdapter`, it
+    needs no thread of its own, so a single loop can drive many toys."""
+
+    @staticmethod
+    async def scan_toys(timeout: float = 5.0):
+        return await bleak.BleakScanner.discover(timeout)
+
+    @staticmethod
+    async def scan_toy(name: str, timeout: float = 5.0):
+        return await bleak.BleakScanner.find_device_by_filter(lambda _, a: a.local_name == name, timeout)
+
+    def __init__(self, address):
+        self.__device = bleak.BleakClient(address, timeout=5.0)
+
+    async def connect(self):
+        await self.__device.connect()
+
+    async def close(self):
+        await self.__device.disconnect()
+
+    async def set_callback(self, uuid, cb):
+        await self.__device.start_notify(uuid, cb)
+
+    @property
+    def mtu(self):
+        """Largest payload that fits in a single write with the negotiated ATT MTU."""
+        return self.__device.mtu_size - 3
+
+    async def write(self, uuid, data, response=True):
+        await self.__device.write_gatt_char(uuid, data, response)
+
+
+class BleakRuntime:
+    """Event loop shared by every :class:`BleakAdapter` of the process, running on a single thread, so that all
+    connections are multiplexed on it instead of each running a loop and a thread of its own. It is started by the
+    first adapter and stopped when the last one is closed."""
+
+    __lock = threading.Lock()
+    __shared = None
+
+    @classmethod
+    def acquire(cls) -> 'BleakRuntime':
+        with cls.__lock:
+            if cls.__shared is None:
+                cls.__shared = cls()
+            runtime = cls.__shared
+            runtime.__users += 1
+            return runtime
+
+    def __init__(self):
+        self.__users = 0
+        self.loop = asyncio.new_event_loop()
+        self.__thread = threading.Thread(target=self.loop.run_forever, name='BleakRuntime')
+        self.__thread.start()
+
+    def release(self):
+        with BleakRuntime.__lock:
+            self.__users -= 1
+            if self.__users:
+                return
+            BleakRuntime.__shared = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.__thread.join()
+        self.loop.close()
+
+    def run(self, coroutine):
+        """Runs the coroutine on the shared loop and waits for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
 class BleakAdapter:
+    async_adapter = AsyncBleakAdapter
+
     @staticmethod
     def scan_toys(timeout: float = 5.0):
-        return asyncio.run(bleak.BleakScanner.discover(timeout))
+        runtime = BleakRuntime.acquire()
+        try:
+            return runtime.run(bleak.BleakScanner.discover(timeout))
+        finally:
+            runtime.release()
 
     @staticmethod
     def scan_toy(name: str, timeout: float = 5.0):
-        return asyncio.run(
-            bleak.BleakScanner.find_device_by_filter(
-                lambda _, a: a.local_name == name, timeout))
+        runtime = BleakRuntime.acquire()
+        try:
+            return runtime.run(bleak.BleakScanner.find_device_by_filter(lambda _, a: a.local_name == name, timeout))
+        finally:
+            runtime.release()
 
     def __init__(self, address):
-        self.__event_loop = asyncio.new_event_loop()
+        self.__runtime = BleakRuntime.acquire()
         self.__device = bleak.BleakClient(address, timeout=5.0)
-        self.__lock = threading.Lock()
-        self.__thread = threading.Thread(target=self.__event_loop.run_forever)
-        self.__thread.start()
+        self.__writes = None
+        self.__writer = None
+        self.__closed = False
         try:
-            self.__execute(self.__device.connect())
+            self.__runtime.run(self.__connect())
         except:
             self.close(False)
             raise
 
-    def __execute(self, coroutine):
-        with self.__lock:
-            return asyncio.run_coroutine_threadsafe(coroutine, self.__event_loop).result()
+    async def __connect(self):
+        self.__writes = asyncio.Queue()
+        self.__writer = asyncio.get_running_loop().create_task(self.__process_writes())
+        await self.__device.connect()
 
-    def close(self, disconnect=True):
+    async def __process_writes(self):
+        while True:
+            uuid, data, response, future = await self.__writes.get()
+            try:
+                await self.__device.write_gatt_char(uuid, data, response)
+            except asyncio.CancelledError:
+                future.set_exception(ConnectionError('Adapter closed'))
+                raise
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+
+    def __enqueue(self, write):
+        if self.__closed:
+            write[3].set_exception(ConnectionError('Adapter closed'))
+        else:
+            self.__writes.put_nowait(write)
+
+    async def __disconnect(self, disconnect):
+        self.__closed = True
+        if self.__writer is not None:
+            self.__writer.cancel()
+            try:
+                await self.__writer
+            except asyncio.CancelledError:
+                pass
+            # Fail the writes still queued, so that no thread keeps waiting for them
+            while not self.__writes.empty():
+                self.__writes.get_nowait()[3].set_exception(ConnectionError('Adapter closed'))
         if disconnect:
-            self.__execute(self.__device.disconnect())
-        with self.__lock:
-            self.__event_loop.call_soon_threadsafe(self.__event_loop.stop)
-            self.__thread.join()
-        self.__event_loop.close()
+            await self.__device.disconnect()
+
+    def close(self, disconnect=True):
+        try:
+            self.__runtime.run(self.__disconnect(disconnect))
+        finally:
+            self.__runtime.release()
 
     def set_callback(self, uuid, cb):
-        self.__execute(self.__device.start_notify(uuid, cb))
+        self.__runtime.run(self.__device.start_notify(uuid, cb))
+
+    @property
+    def mtu(self):
+        """Largest payload that fits in a single write with the negotiated ATT MTU."""
+        return self.__device.mtu_size - 3
+
+    @property
+    def pending_writes(self) -> int:
+        """Number of writes waiting in the queue of this connection."""
+        return self.__writes.qsize()
 
-    def write(self, uuid, data):
-        self.__execute(self.__device.write_gatt_char(uuid, data, True))
+    def write(self, uuid, data, response=True):
+        """Queues the write on this connection and waits until it is done. Writes of a connection are done in order,
+        independently of other connections. Raises :class:`ConnectionError` if the adapter is closed first."""
+        if self.__closed:
+            raise ConnectionError('Adapter closed')
+        future = futures.Future()
+        self.__runtime.loop.call_soon_threadsafe(self.__enqueue, (uuid, data, response, future))
+        future.result()
@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from spherov2.recorder import RecordKind, read_log
+
+
+class MockDevice(NamedTuple):
+    name: str
+    address: str
+
+
+def get_replay_adapter(path: str, speed: Optional[float] = 1.0, name: str = 'Replay', sync_writes: bool = True):
+    """Gets an anonymous ``ReplayAdapter`` feeding the notifications of a log written by
+    :class:`spherov2.recorder.Recorder` back to the toy, through its usual packet collector and listeners. They are
+    replayed ``speed`` times as fast as they were recorded, or as fast as possible if ``speed`` is ``None``.
+    ``ReplayAdapter.finished`` is set once the whole log has been replayed, and cleared when a new connection starts
+    replaying it.
+
+    Writes to the adapter are dropped. With ``sync_writes``, the replay pauses at each write of the log until the toy
+    has written as many times, so that recorded responses arrive after their requests when the toy repeats the
+    commands of the recorded session."""
+
+    class ReplayAdapter:
+        finished = threading.Event()
+
+        @staticmethod
+        def scan_toys(timeout=5.0):
+            return [MockDevice(name, path)]
+
+        @staticmethod
+        def scan_toy(toy_name: str, timeout: float = 5.0):
+            return MockDevice(name, path) if toy_name == name else None
+
+        def __init__(self, address):
+            self.__callbacks = {}
+            self.__stopped = threading.Event()
+            self.__writes = threading.Semaphore(0)
+            self.__thread = threading.Thread(target=self.__replay, name='ReplayAdapter')
+
+        def __replay(self):
+            start = time.monotonic()
+            for record in read_log(path):
+                if self.__stopped.is_set():
+                    break
+                if record.kind == RecordKind.WRITE:
+                    if sync_writes:
+                        while not self.__writes.acquire(timeout=.1):
+                            if self.__stopped.is_set():
+                                return
+                        if speed:
+                            start = time.monotonic() - record.time / speed
+                    continue
+                if speed:
+                    delay = start + record.time / speed - time.monotonic()
+                    if delay > 0 and self.__stopped.wait(delay):
+                        break
+                for f in self.__callbacks.get(record.uuid, ()):
+                    f(record.uuid, record.data)
+            ReplayAdapter.finished.set()
+
+        def close(self):
+            self.__stopped.set()
+            ReplayAdapter.finished.set()
+            if self.__thread.is_alive():
+                self.__thread.join()
+
+        def set_callback(self, uuid, cb):
+            self.__callbacks.setdefault(uuid, set()).add(cb)
+            if self.__thread.ident is None:
+                ReplayAdapter.finished.clear()
+                self.__thread.start()
+
+        def write(self, uuid, data, response=True):
+            self.__writes.release()
+
+    return ReplayAdapter
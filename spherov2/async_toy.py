@@ -0,0 +1,114 @@
+import asyncio
+import inspect
+from functools import partialmethod, wraps
+
+from spherov2.toy import Toy
+
+
+class _Pending(Exception):
+    def __init__(self, packet=None, key=None, timeout=None):
+        super().__init__()
+        self.packet = packet
+        self.key = key
+        self.timeout = timeout
+
+
+class _Replay:
+    """Stands in for a toy while a command runs, answering its requests with the responses received so far. The next
+    request without a response is raised as :class:`_Pending`, so that the command can be run again once it arrives.
+    Packets built by earlier runs are reused, so that each request takes a single sequence number."""
+
+    def __init__(self, toy, responses, packets):
+        self.__toy = toy
+        self.__responses = responses
+        self.__index = 0
+        self.__packets = packets
+        self.__packet_index = 0
+
+    def __getattr__(self, name):
+        return getattr(self.__toy, name)
+
+    @property
+    def _packet_manager(self):
+        return self
+
+    def new_packet(self, *args, **kwargs):
+        if self.__packet_index == len(self.__packets):
+            self.__packets.append(self.__toy._packet_manager.new_packet(*args, **kwargs))
+        packet = self.__packets[self.__packet_index]
+        self.__packet_index += 1
+        return packet
+
+    def __next(self, pending):
+        if self.__index == len(self.__responses):
+            raise pending
+        response = self.__responses[self.__index]
+        self.__index += 1
+        return response
+
+    def _execute(self, packet):
+        return self.__next(_Pending(packet))
+
+    def _wait_packet(self, key, timeout=None, check_error=False):
+        packet = self.__next(_Pending(key=key, timeout=timeout))
+        if check_error:
+            packet.check_error()
+        return packet
+
+
+def _is_command(attr) -> bool:
+    if isinstance(attr, partialmethod):
+        attr = attr.func
+    return inspect.isfunction(attr) and attr.__module__.startswith('spherov2.commands.')
+
+
+class AsyncToy:
+    """Asyncio interface of a toy, for driving many toys from a single event loop without threads.
+
+    Within ``async with``, every command of the toy is a coroutine function that resolves to the same result as its
+    synchronous counterpart, e.g. ``await toy.get_battery_voltage()``. Listeners are called on the running loop and
+    may be coroutine functions. Other attributes, such as controls or listener registration, are those of the wrapped
+    toy, whose commands are written without waiting for their responses when called on the loop while it is in
+    ``async with``, so that reading their results raises :class:`RuntimeError`."""
+
+    def __init__(self, toy: Toy):
+        self.__toy = toy
+
+    def __repr__(self):
+        return repr(self.__toy)
+
+    @property
+    def toy(self) -> Toy:
+        return self.__toy
+
+    async def __aenter__(self):
+        await self.__toy.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.__toy.__aexit__(exc_type, exc_val, exc_tb)
+
+    def __getattr__(self, name):
+        command = inspect.getattr_static(type(self.__toy), name, None)
+        if not _is_command(command):
+            return getattr(self.__toy, name)
+
+        @wraps(getattr(self.__toy, name))
+        async def execute(*args, **kwargs):
+            return await self.__run(command, args, kwargs)
+
+        return execute
+
+    async def __run(self, command, args, kwargs):
+        toy = self.__toy
+        responses, packets = [], []
+        while True:
+            try:
+                return command.__get__(_Replay(toy, responses, packets), type(toy))(*args, **kwargs)
+            except _Pending as pending:
+                if pending.packet is not None:
+                    future = toy._submit(pending.packet)
+                else:
+                    future = toy._expect(pending.key, pending.timeout)
+                timeout = toy._response_timeout if pending.timeout is None else pending.timeout
+                responses.append(await asyncio.wait_for(asyncio.wrap_future(future), timeout))
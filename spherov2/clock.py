@@ -0,0 +1,100 @@
+import threading
+from collections import deque
+from typing import Optional, Tuple
+
+
+class DeviceClock:
+    """Online estimate of the offset and drift of the clock of a toy relative to :func:`time.monotonic`.
+
+    The best estimates come from exchanges, a request for the device time sent and answered at known host times: the
+    device time is taken to be read halfway through, and only the exchanges with the shortest round trips among the
+    last ``window`` are fitted, so that delayed responses do not skew the estimate. Toys that cannot be asked for their
+    time but stream it with their samples are mapped by the smallest delay between a sample and its arrival over the
+    last ``arrival_window`` seconds, which only lags the true clock by the minimum latency of the link.
+
+    The estimate is reset when the device clock goes backwards, as when the toy was restarted."""
+
+    def __init__(self, window: int = 16, arrival_window: float = 30.):
+        self.__exchanges = deque(maxlen=window)
+        self.__arrivals = deque()
+        self.__arrival_window = arrival_window
+        self.__last_device_time = None
+        self.__fit = None
+        self.__lock = threading.Lock()
+
+    @property
+    def synchronized(self) -> bool:
+        return self.__fit is not None
+
+    @property
+    def drift(self) -> float:
+        """Seconds gained by the host per second of the device, ``0`` until it can be estimated."""
+        fit = self.__fit
+        return 0. if fit is None else fit[2] - 1
+
+    def add_exchange(self, device_time: float, sent: float, received: float):
+        """Records the device time in seconds, as answered to a request written at ``sent`` and answered at
+        ``received``."""
+        with self.__lock:
+            self.__check(device_time)
+            self.__exchanges.append((device_time, (sent + received) / 2, received - sent))
+            self.__refit()
+
+    def add_arrival(self, device_time: float, received: float):
+        """Records the device time in seconds of a streamed sample received at ``received``."""
+        with self.__lock:
+            self.__check(device_time)
+            if self.__exchanges:
+                return
+            # Monotonic deque of the smallest delays, so that the minimum of the window is at its front
+            delay = received - device_time
+            arrivals = self.__arrivals
+            while arrivals and arrivals[-1][1] >= delay:
+                arrivals.pop()
+            arrivals.append((device_time, delay))
+            while arrivals[0][0] < device_time - self.__arrival_window:
+                arrivals.popleft()
+            anchor, delay = arrivals[0]
+            self.__fit = anchor, anchor + delay, 1.
+
+    def __check(self, device_time):
+        if self.__last_device_time is not None and device_time < self.__last_device_time:
+            self.__exchanges.clear()
+            self.__arrivals.clear()
+            self.__fit = None
+        self.__last_device_time = device_time
+
+    def __refit(self):
+        exchanges = sorted(self.__exchanges, key=lambda e: e[2])[:max(1, (len(self.__exchanges) + 1) // 2)]
+        n = len(exchanges)
+        mean_device = sum(e[0] for e in exchanges) / n
+        mean_host = sum(e[1] for e in exchanges) / n
+        variance = sum((e[0] - mean_device) ** 2 for e in exchanges)
+        rate = 1.
+        if n > 1 and variance > 1.:
+            rate = sum((e[0] - mean_device) * (e[1] - mean_host) for e in exchanges) / variance
+        self.__fit = mean_device, mean_host, rate
+
+    def timestamp(self, received: float, device_time: Optional[float] = None) -> Tuple[float, Optional[float]]:
+        """Host and device times of a sample received at ``received``, which is only its host time if the sample does
+        not carry its ``device_time``, or if the clock has not been synchronized yet."""
+        if device_time is None:
+            return received, self.to_device(received)
+        self.add_arrival(device_time, received)
+        return self.to_host(device_time), device_time
+
+    def to_host(self, device_time: float) -> Optional[float]:
+        """Host time of a device time in seconds, or ``None`` if the clock has not been synchronized yet."""
+        fit = self.__fit
+        if fit is None:
+            return None
+        device, host, rate = fit
+        return host + (device_time - device) * rate
+
+    def to_device(self, host_time: float) -> Optional[float]:
+        """Device time in seconds of a host time, or ``None`` if the clock has not been synchronized yet."""
+        fit = self.__fit
+        if fit is None:
+            return None
+        device, host, rate = fit
+        return device + (host_time - host) / rate
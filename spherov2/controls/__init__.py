@@ -1,4 +1,9 @@
+import struct
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
 from spherov2.commands.sphero import RawMotorModes
+from spherov2.subscription import SensorSubscription
 
 _ = RawMotorModes
 
@@ -9,3 +14,151 @@ class PacketDecodingException(Exception):
 
 class CommandExecuteError(Exception):
     ...
+
+
+class SensorDecoder:
+    """Decoder of sensor streaming packets for a fixed set of enabled sensors, compiled whenever the set changes, so
+    that a packet is unpacked with a single precomputed :class:`struct.Struct` and only components with a modifier are
+    touched afterwards.
+
+    :param sensors: Enabled sensors in the order their values are streamed, mapped to their components.
+    :param value_format: :mod:`struct` format character of a single value.
+    :param rotated: Sensors whose ``x`` and ``y`` components are rotated by 90°, as ``(-y, x)``."""
+
+    def __init__(self, sensors: Iterable[Tuple[str, Dict]], value_format: str, rotated: Iterable[str] = ()):
+        self.__layout = []
+        columns = []
+        modifiers = []
+        for sensor, components in sensors:
+            start = len(columns)
+            for name, component in components.items():
+                if component.modifier:
+                    modifiers.append((len(columns), component.modifier))
+                columns.append(f'{sensor}.{name}')
+            self.__layout.append((sensor, tuple(components), start))
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.__modifiers = modifiers
+        self.__rotations = [(columns.index(f'{sensor}.x'), columns.index(f'{sensor}.y')) for sensor in rotated
+                            if f'{sensor}.x' in columns and f'{sensor}.y' in columns]
+        self.__struct = struct.Struct(f'>{len(columns)}{value_format}')
+
+    @property
+    def size(self) -> int:
+        """Number of bytes of a single sample."""
+        return self.__struct.size
+
+    def values(self, data) -> Optional[List[float]]:
+        """Values of all enabled components in :attr:`columns` order, or ``None`` if the packet is too short, as when
+        it was streamed before the sensors changed."""
+        if len(data) < self.__struct.size:
+            return None
+        return self.__finish(list(self.__struct.unpack_from(data)))
+
+    def samples(self, data) -> List[List[float]]:
+        """Values of each of the samples packed back to back in the packet, ignoring a trailing partial sample."""
+        size = self.__struct.size
+        if not size:
+            return [[]]
+        return [self.__finish(list(values))
+                for values in self.__struct.iter_unpack(memoryview(data)[:len(data) // size * size])]
+
+    def __finish(self, values: List[float]) -> List[float]:
+        for i, modifier in self.__modifiers:
+            values[i] = modifier(values[i])
+        for x, y in self.__rotations:
+            values[x], values[y] = -values[y], values[x]
+        return values
+
+    def nest(self, values: List[float]) -> Dict[str, Dict[str, float]]:
+        """Groups the values of a sample by sensor, as passed to sensor data listeners."""
+        return {sensor: dict(zip(components, values[start:start + len(components)]))
+                for sensor, components, start in self.__layout}
+
+    def decode(self, data) -> Optional[Dict[str, Dict[str, float]]]:
+        values = self.values(data)
+        if values is None:
+            return None
+        return self.nest(values)
+
+
+class SensorListeners:
+    """Listeners and subscriptions of a sensor control, which publishes each decoded sample to them with
+    :meth:`_publish_values` and :meth:`_publish_data`, and applies its settings to the toy in ``_update``, deferred
+    by :meth:`batch` until the end of the block."""
+
+    def __init__(self, toy):
+        self.__toy = toy
+        self.__listeners = set()
+        self.__values_listeners = set()
+        self.__subscriptions = set()
+        self.__batch = 0
+
+    def add_sensor_data_listener(self, listener: Callable[[Dict[str, Dict[str, float]]], None]):
+        self.__listeners.add(listener)
+
+    def remove_sensor_data_listener(self, listener: Callable[[Dict[str, Dict[str, float]]], None]):
+        self.__listeners.remove(listener)
+
+    def add_sensor_values_listener(self,
+                                   listener: Callable[[Tuple[str, ...], List[float], float, Optional[float]], None]):
+        """Adds a listener called with the column names (like ``'accelerometer.x'``), the flat list of values, and the
+        host and device times of each sample, for consumers that do not need nested dicts. The names only change along
+        with enabled sensors. Times are mapped between the :func:`time.monotonic` clock of the host and the clock of
+        the toy by :attr:`spherov2.toy.Toy.clock`, the device time being ``None`` until it is synchronized."""
+        self.__values_listeners.add(listener)
+
+    def remove_sensor_values_listener(self,
+                                      listener: Callable[[Tuple[str, ...], List[float], float, Optional[float]], None]):
+        self.__values_listeners.remove(listener)
+
+    def subscribe(self, listener: Callable[[Dict[str, Dict[str, float]]], None], *sensors,
+                  **options) -> SensorSubscription:
+        """Subscribes the listener to the given sensors, or all of them, see :class:`SensorSubscription` for the
+        ``max_rate``, ``average``, ``policy`` and ``max_pending`` options."""
+        subscription = SensorSubscription(self.__toy, listener, sensors, **options)
+        self.__subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: SensorSubscription):
+        self.__subscriptions.discard(subscription)
+
+    @contextmanager
+    def batch(self):
+        """Defers updating the toy until the end of the block, so that the settings changed within it are sent at
+        once."""
+        self.__batch += 1
+        try:
+            yield self
+        finally:
+            self.__batch -= 1
+            if not self.__batch:
+                self._update()
+
+    @property
+    def _batching(self) -> bool:
+        return self.__batch > 0
+
+    def _update(self):
+        raise NotImplementedError
+
+    @property
+    def _wants_values(self) -> bool:
+        return bool(self.__values_listeners or self.__subscriptions or self.__toy.sensor_bus.active)
+
+    @property
+    def _wants_data(self) -> bool:
+        return bool(self.__listeners)
+
+    def _publish_values(self, columns: Tuple[str, ...], values: List[float], host_time: float,
+                        device_time: Optional[float]):
+        dispatcher = self.__toy.dispatcher
+        for f in self.__values_listeners:
+            dispatcher.dispatch(f, columns, values, host_time, device_time)
+        for subscription in self.__subscriptions:
+            subscription.feed(columns, values, host_time, device_time)
+        self.__toy.sensor_bus.publish(columns, values, host_time, device_time)
+
+    def _publish_data(self, data: Dict[str, Dict[str, float]]):
+        dispatcher = self.__toy.dispatcher
+        for f in self.__listeners:
+            dispatcher.dispatch(f, data)
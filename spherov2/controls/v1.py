@@ -1,9 +1,12 @@
 import threading
+import time
+from collections import Counter
 from enum import IntEnum
-from typing import NamedTuple, Callable, Dict, List
+from typing import NamedTuple
 
+from spherov2.commands.async_ import Async
 from spherov2.commands.sphero import ReverseFlags, RollModes
-from spherov2.controls import PacketDecodingException, CommandExecuteError
+from spherov2.controls import PacketDecodingException, CommandExecuteError, SensorDecoder, SensorListeners
 from spherov2.helper import packet_chk, to_bytes
 
 
@@ -71,6 +74,10 @@ class Packet:
             payload.append(packet_chk(payload[2:]))
             return payload
 
+        @property
+        def busy(self):
+            return self.mrsp == Packet.Error.message_timeout
+
         def check_error(self):
             if self.mrsp != Packet.Error.command_succeeded:
                 raise CommandExecuteError(self.mrsp)
@@ -113,42 +120,81 @@ class Packet:
     class Manager:
         def __init__(self):
             self.__seq = 0
+            self.__lock = threading.Lock()
 
         def new_packet(self, did, cid, _, data=None):
-            packet = Packet.Request(did, cid, self.__seq, bytearray(data or []))
-            self.__seq = (self.__seq + 1) % 0x100
-            return packet
+            with self.__lock:
+                seq = self.__seq
+                self.__seq = (seq + 1) % 0x100
+            return Packet.Request(did, cid, seq, bytearray(data or []))
 
     class Collector:
+        """Splits received data into responses and asynchronous messages, reading each one in place from the buffer.
+        Corrupt packets are counted in :attr:`errors` by reason and skipped, resuming at the next start of packet, and
+        bytes outside of packets are counted in :attr:`discarded`."""
+
         def __init__(self, callback):
             self.__callback = callback
             self.__data = bytearray()
+            self.errors = Counter()
+            self.discarded = 0
 
         def add(self, data):
-            if not self.__data:
-                while data and data[0] != Packet.SOP:
-                    data.pop(0)
-            self.__data.extend(data)
-            while len(self.__data) > 4:
-                sop1, sop2, *payload = self.__data
-                if sop1 != Packet.SOP:
-                    self.__data.clear()
-                    raise PacketDecodingException('Unexpected start of packet')
-                if sop2 == Packet.SOP:
-                    _, _, dlen, *remain = payload
-                    if dlen > len(remain):
+            buffer = self.__data
+            buffer += data
+            size = len(buffer)
+            pos = 0
+            try:
+                while True:
+                    start = buffer.find(_SOP, pos)
+                    if start == -1:
+                        self.discarded += size - pos
+                        pos = size
                         break
-                    self.__callback(Packet.parse_response(payload[:dlen + 3]))
-                    self.__data = remain[dlen:]
-                elif sop2 == Packet.ASYNC:
-                    _, dlen_msb, dlen_lsb, *remain = payload
-                    dlen = (dlen_msb << 8) | dlen_lsb
-                    if dlen > len(remain):
+                    self.discarded += start - pos
+                    pos = start
+                    if size - start < 5:
                         break
-                    self.__callback(Packet.parse_async(payload[:dlen + 3]))
-                    self.__data = remain[dlen:]
-                else:
-                    raise PacketDecodingException('Unexpected start of packet 2')
+                    sop2 = buffer[start + 1]
+                    if sop2 == Packet.SOP:
+                        end = start + 5 + buffer[start + 4]
+                    elif sop2 == Packet.ASYNC:
+                        end = start + 5 + (buffer[start + 3] << 8 | buffer[start + 4])
+                    else:
+                        self.errors['Unexpected start of packet 2'] += 1
+                        pos = start + 1
+                        continue
+                    if end == start + 5:
+                        self.errors['Bad data length'] += 1
+                        pos = start + 1
+                        continue
+                    if end > size:
+                        break
+                    if packet_chk(buffer[start + 2:end - 1]) != buffer[end - 1]:
+                        self.errors['Bad response checksum'] += 1
+                        pos = start + 1
+                        continue
+                    pos = end
+                    data = buffer[start + 5:end - 1]
+                    if sop2 == Packet.SOP:
+                        mrsp = _errors.get(buffer[start + 2])
+                        if mrsp is None:
+                            self.errors['Unknown response code'] += 1
+                            continue
+                        packet = Packet.Response(mrsp, buffer[start + 3], data)
+                    else:
+                        packet = Packet.Async(buffer[start + 2], data)
+                    self.__callback(packet)
+            finally:
+                del buffer[:pos]
+
+
+_SOP = bytes((Packet.SOP,))
+_sensor_streaming_data = Async.sensor_streaming_data_notify[0], lambda listener, p: listener(p.data)
+_errors = {int(e): e for e in Packet.Error}
+_streaming_rate = 400
+_max_packet_rate = 25
+_max_samples_size = 240
 
 
 class DriveControl:
@@ -192,60 +238,74 @@ class LedControl:
         self.__toy = toy
 
 
-class SensorControl:
+class SensorControl(SensorListeners):
     def __init__(self, toy):
-        toy.add_sensor_streaming_data_notify_listener(self.__sensor_streaming_data)
+        super().__init__(toy)
+        toy._add_listener(_sensor_streaming_data, self.__sensor_streaming_data)
 
         self.__toy = toy
         self.__count = 0
         self.__interval = 250
+        self.__samples_per_packet = 0
+        self.__sent = None
+        self.__connection = None
         self.__enabled = {}
         self.__enabled_extended = {}
-        self.__listeners = set()
-
-    def add_sensor_data_listener(self, listener: Callable[[Dict[str, Dict[str, float]]], None]):
-        self.__listeners.add(listener)
-
-    def remove_sensor_data_listener(self, listener: Callable[[Dict[str, Dict[str, float]]], None]):
-        self.__listeners.remove(listener)
-
-    def __sensor_streaming_data(self, sensor_data: List[int]):
-        data = {}
-
-        def __new_data():
-            n = {}
-            for name, component in components.items():
-                d = sensor_data.pop(0)
-                if component.modifier:
-                    d = component.modifier(d)
-                n[name] = d
-            if self.__toy.name.startswith('2B') and sensor in ['locator', 'velocity']:
-                n['x'], n['y'] = -n['y'], n['x']
-            data[sensor] = n
-
-        for sensor, components in self.__toy.sensors.items():
-            if sensor in self.__enabled:
-                __new_data()
-        for sensor, components in self.__toy.extended_sensors.items():
-            if sensor in self.__enabled_extended:
-                __new_data()
-
-        for f in self.__listeners:
-            threading.Thread(target=f, args=(data,)).start()
+        self.__decoder = self.__compile()
+
+    def __compile(self) -> SensorDecoder:
+        sensors = [(sensor, components) for sensor, components in self.__toy.sensors.items()
+                   if sensor in self.__enabled]
+        sensors += [(sensor, components) for sensor, components in self.__toy.extended_sensors.items()
+                    if sensor in self.__enabled_extended]
+        rotated = ('locator', 'velocity') if self.__toy.name.startswith('2B') else ()
+        return SensorDecoder(sensors, 'h', rotated)
+
+    def __sensor_streaming_data(self, sensor_data: bytearray):
+        decoder = self.__decoder
+        samples = decoder.samples(sensor_data)
+        # Samples packed in a packet were taken one interval apart, the last one just before it was sent
+        now = time.monotonic()
+        period = self.__interval / _streaming_rate
+        last = len(samples) - 1
+        for i, values in enumerate(samples):
+            if self._wants_values:
+                host_time, device_time = self.__toy.clock.timestamp(now - (last - i) * period)
+                self._publish_values(decoder.columns, values, host_time, device_time)
+            if self._wants_data:
+                self._publish_data(decoder.nest(values))
 
     def set_count(self, count: int):
         if count >= 0 and count != self.__count:
             self.__count = count
-            self.__update()
+            self._update()
 
     def set_interval(self, interval: int):
         if interval >= 0 and interval != self.__interval:
             self.__interval = interval * 4 // 10
             if self.__interval == 0 and interval > 0:
                 self.__interval = 1
-            self.__update()
-
-    def __update(self):
+            self._update()
+
+    def set_samples_per_packet(self, samples: int):
+        """Sets how many samples the toy packs in each streamed packet, trading latency for fewer notifications.
+        ``0``, the default, picks the smallest number keeping the toy below 25 packets per second at the current
+        interval."""
+        if samples >= 0 and samples != self.__samples_per_packet:
+            self.__samples_per_packet = samples
+            self._update()
+
+    def __pack(self, size: int) -> int:
+        samples = self.__samples_per_packet
+        if samples == 0:
+            rate = _streaming_rate / max(self.__interval, 1)
+            samples = -(-rate // _max_packet_rate)
+        return int(max(1, min(samples, _max_samples_size // max(size, 1))))
+
+    def _update(self):
+        if self._batching:
+            return
+        self.__decoder = self.__compile()
         sensors_mask = extended_sensors_mask = 0
         for sensor in self.__enabled.values():
             for component in sensor.values():
@@ -253,7 +313,13 @@ class SensorControl:
         for sensor in self.__enabled_extended.values():
             for component in sensor.values():
                 extended_sensors_mask |= component.bit
-        self.__toy.set_data_streaming(self.__interval, 1, sensors_mask, self.__count, extended_sensors_mask)
+        state = self.__interval, self.__pack(self.__decoder.size), sensors_mask, self.__count, extended_sensors_mask
+        if self.__connection != self.__toy._connections:
+            # Nothing was sent over this connection yet, and the toy may have been restarted since
+            self.__connection, self.__sent = self.__toy._connections, None
+        if state != self.__sent:
+            self.__toy.set_data_streaming(*state)
+            self.__sent = state
 
     def enable(self, *sensors):
         for sensor in sensors:
@@ -261,18 +327,18 @@ class SensorControl:
                 self.__enabled[sensor] = self.__toy.sensors[sensor]
             elif sensor in self.__toy.extended_sensors:
                 self.__enabled_extended[sensor] = self.__toy.extended_sensors[sensor]
-        self.__update()
+        self._update()
 
     def disable(self, *sensors):
         for sensor in sensors:
             self.__enabled.pop(sensor, None)
             self.__enabled_extended.pop(sensor, None)
-        self.__update()
+        self._update()
 
     def disable_all(self):
         self.__enabled.clear()
         self.__enabled_extended.clear()
-        self.__update()
+        self._update()
 
 
 class StatsControl:
@@ -1,13 +1,19 @@
+import struct
 import threading
-from collections import OrderedDict, defaultdict
+import time
+from collections import OrderedDict, defaultdict, Counter
 from enum import IntEnum, Enum, auto, IntFlag
-from typing import Dict, List, Callable, NamedTuple, Tuple
+from typing import Dict, List, Callable, NamedTuple, Tuple, Optional, Iterable
+
+import numpy as np
 
 from spherov2.commands.drive import DriveFlags
 from spherov2.commands.drive import RawMotorModes as DriveRawMotorModes
 from spherov2.commands.io import IO
-from spherov2.controls import RawMotorModes, PacketDecodingException, CommandExecuteError
-from spherov2.helper import to_bytes, to_int, packet_chk
+from spherov2.commands.sensor import Sensor
+from spherov2.controls import RawMotorModes, PacketDecodingException, CommandExecuteError, SensorDecoder, \
+    SensorListeners
+from spherov2.helper import packet_chk, to_bytes
 from spherov2.listeners.sensor import StreamingServiceData
 
 
@@ -57,96 +63,109 @@ class Packet(NamedTuple):
 
     @staticmethod
     def parse_response(data) -> 'Packet':
-        sop, *data, eop = data
-        if sop != Packet.Encoding.start:
+        data = bytes(data)
+        if not data or data[0] != _SOP:
             raise PacketDecodingException('Unexpected start of packet')
-        if eop != Packet.Encoding.end:
+        if data[-1] != _EOP:
             raise PacketDecodingException('Unexpected end of packet')
-        *data, chk = Packet.__unescape_data(data)
-        if packet_chk(data) != chk:
+        data = Packet.unescape(data[1:-1])
+        if len(data) < 5:
+            raise PacketDecodingException('Packet too short')
+        if packet_chk(memoryview(data)[:-1]) != data[-1]:
             raise PacketDecodingException('Bad response checksum')
 
-        flags = data.pop(0)
+        flags = data[0]
+        header = 5 + bool(flags & _HAS_TARGET_ID) + bool(flags & _HAS_SOURCE_ID) + bool(flags & _IS_RESPONSE)
+        if len(data) < header:
+            raise PacketDecodingException('Packet too short')
+        i = 1
 
         tid = None
-        if flags & Packet.Flags.has_target_id:
-            tid = data.pop(0)
+        if flags & _HAS_TARGET_ID:
+            tid = data[i]
+            i += 1
 
         sid = None
-        if flags & Packet.Flags.has_source_id:
-            sid = data.pop(0)
+        if flags & _HAS_SOURCE_ID:
+            sid = data[i]
+            i += 1
 
-        did, cid, seq, *data = data
+        did, cid, seq = data[i:i + 3]
+        i += 3
 
         err = Packet.Error.success
-        if flags & Packet.Flags.is_response:
-            err = Packet.Error(data.pop(0))
+        if flags & _IS_RESPONSE:
+            err = _errors.get(data[i])
+            if err is None:
+                raise PacketDecodingException('Unknown error code')
+            i += 1
+
+        return Packet(flags, did, cid, seq, tid, sid, bytearray(data[i:-1]), err)
 
-        return Packet(flags, did, cid, seq, tid, sid, bytearray(data), err)
+    @staticmethod
+    def escape(data) -> bytes:
+        """Escapes the special bytes of a frame body."""
+        return bytes(data).replace(_ESCAPE, _ESCAPED_ESCAPE).replace(_START, _ESCAPED_START).replace(_END, _ESCAPED_END)
 
     @staticmethod
-    def __unescape_data(response_data) -> List[int]:
-        raw_data = []
-
-        iter_response_data = iter(response_data)
-        for b in iter_response_data:
-            if b == Packet.Encoding.escape:
-                b = next(iter_response_data, None)
-                if b == Packet.Encoding.escaped_escape:
-                    b = Packet.Encoding.escape
-                elif b == Packet.Encoding.escaped_start:
-                    b = Packet.Encoding.start
-                elif b == Packet.Encoding.escaped_end:
-                    b = Packet.Encoding.end
-                else:
-                    raise PacketDecodingException('Unexpected escaping byte')
-
-            raw_data.append(b)
-
-        return raw_data
+    def unescape(data: bytes) -> bytes:
+        """Reverses :func:`escape`, returning the data itself if nothing is escaped."""
+        if _ESCAPE not in data:
+            return data
+        first, *parts = data.split(_ESCAPE)
+        raw = [first]
+        for part in parts:
+            b = _unescaped.get(part[:1])
+            if b is None:
+                raise PacketDecodingException('Unexpected escaping byte')
+            raw.append(b)
+            raw.append(part[1:])
+        return b''.join(raw)
 
     @property
     def id(self) -> Tuple:
         return self.did, self.cid, self.seq
 
+    @property
+    def busy(self) -> bool:
+        return self.err == Packet.Error.busy
+
     def build(self) -> bytearray:
-        packet = bytearray([self.flags])
+        flags = self.flags
+        packet = bytearray((flags,))
 
-        if self.flags & Packet.Flags.has_target_id:
+        if flags & _HAS_TARGET_ID:
             packet.append(self.tid)
 
-        if self.flags & Packet.Flags.has_source_id:
+        if flags & _HAS_SOURCE_ID:
             packet.append(self.sid)
 
-        packet.extend(self.id)
+        packet += bytes((self.did, self.cid, self.seq))
 
-        if self.flags & Packet.Flags.is_response:
+        if flags & _IS_RESPONSE:
             packet.append(self.err)
 
-        packet.extend(self.data)
+        packet += self.data
         packet.append(packet_chk(packet))
 
-        escaped_packet = bytearray([Packet.Encoding.start])
-        for c in packet:
-            if c == Packet.Encoding.escape:
-                escaped_packet.extend((Packet.Encoding.escape, Packet.Encoding.escaped_escape))
-            elif c == Packet.Encoding.start:
-                escaped_packet.extend((Packet.Encoding.escape, Packet.Encoding.escaped_start))
-            elif c == Packet.Encoding.end:
-                escaped_packet.extend((Packet.Encoding.escape, Packet.Encoding.escaped_end))
-            else:
-                escaped_packet.append(c)
-        escaped_packet.append(Packet.Encoding.end)
-
+        escaped_packet = bytearray(_START)
+        escaped_packet += Packet.escape(packet)
+        escaped_packet += _END
         return escaped_packet
 
     def check_error(self):
         if self.err != Packet.Error.success:
             raise CommandExecuteError(self.err)
 
+    def without_response(self) -> 'Packet':
+        """Copy of this request that asks the toy to respond only if the command fails."""
+        return self._replace(
+            flags=self.flags & ~Packet.Flags.requests_response | Packet.Flags.requests_only_error_response)
+
     class Manager:
         def __init__(self):
             self.__seq = 0
+            self.__lock = threading.Lock()
 
         def new_packet(self, did, cid, tid=None, data=None):
             flags = Packet.Flags.requests_response | Packet.Flags.is_activity
@@ -154,24 +173,71 @@ class Packet(NamedTuple):
             if tid is not None:
                 flags |= Packet.Flags.has_source_id | Packet.Flags.has_target_id
                 sid = 0x1
-            packet = Packet(flags, did, cid, self.__seq, tid, sid, bytearray(data or []))
-            self.__seq = (self.__seq + 1) % 0xff
-            return packet
+            with self.__lock:
+                seq = self.__seq
+                self.__seq = (seq + 1) % 0xff
+            return Packet(flags, did, cid, seq, tid, sid, bytearray(data or []))
 
     class Collector:
+        """Splits received data into frames. Corrupt or truncated frames are counted in :attr:`errors` by reason and
+        skipped, resuming at the next start of packet, and bytes outside of frames are counted in :attr:`discarded`."""
+
         def __init__(self, callback):
             self.__callback = callback
-            self.__data = []
+            self.__data = bytearray()
+            self.errors = Counter()
+            self.discarded = 0
 
         def add(self, data):
-            for b in data:
-                self.__data.append(b)
-                if b == Packet.Encoding.end:
-                    pkt = self.__data
-                    self.__data = []
-                    if len(pkt) < 6:
-                        raise PacketDecodingException(f'Very small packet {[hex(x) for x in pkt]}')
-                    self.__callback(Packet.parse_response(pkt))
+            buffer = self.__data
+            buffer += data
+            pos = 0
+            try:
+                while True:
+                    start = buffer.find(_START, pos)
+                    if start == -1:
+                        self.discarded += len(buffer) - pos
+                        pos = len(buffer)
+                        break
+                    self.discarded += start - pos
+                    pos = start
+                    end = buffer.find(_END, start + 1)
+                    restart = buffer.find(_START, start + 1, len(buffer) if end == -1 else end)
+                    if restart != -1:
+                        self.errors['Truncated packet'] += 1
+                        pos = restart
+                        continue
+                    if end == -1:
+                        break
+                    pos = end + 1
+                    try:
+                        packet = Packet.parse_response(buffer[start:pos])
+                    except PacketDecodingException as e:
+                        self.errors[str(e)] += 1
+                        continue
+                    self.__callback(packet)
+            finally:
+                del buffer[:pos]
+
+
+_SOP = int(Packet.Encoding.start)
+_EOP = int(Packet.Encoding.end)
+_START = bytes((Packet.Encoding.start,))
+_END = bytes((Packet.Encoding.end,))
+_ESCAPE = bytes((Packet.Encoding.escape,))
+_ESCAPED_ESCAPE = bytes((Packet.Encoding.escape, Packet.Encoding.escaped_escape))
+_ESCAPED_START = bytes((Packet.Encoding.escape, Packet.Encoding.escaped_start))
+_ESCAPED_END = bytes((Packet.Encoding.escape, Packet.Encoding.escaped_end))
+_unescaped = {
+    bytes((Packet.Encoding.escaped_escape,)): _ESCAPE,
+    bytes((Packet.Encoding.escaped_start,)): _START,
+    bytes((Packet.Encoding.escaped_end,)): _END,
+}
+_sensor_streaming_data = Sensor.sensor_streaming_data_notify[0], lambda listener, p: listener(p.data)
+_HAS_TARGET_ID = int(Packet.Flags.has_target_id)
+_HAS_SOURCE_ID = int(Packet.Flags.has_source_id)
+_IS_RESPONSE = int(Packet.Flags.is_response)
+_errors = {int(e): e for e in Packet.Error}
 
 
 class AnimationControl:
@@ -248,56 +314,58 @@ class LedControl:
                 self.__toy.set_all_leds_with_8_bit_mask(mask, led_values)
 
 
-class SensorControl:
+class SensorControl(SensorListeners):
     def __init__(self, toy):
-        toy.add_sensor_streaming_data_notify_listener(self.__process_sensor_stream_data)
+        super().__init__(toy)
+        toy._add_listener(_sensor_streaming_data, self.__process_sensor_stream_data)
 
         self.__toy = toy
         self.__count = 0
         self.__interval = 250
         self.__enabled = {}
         self.__enabled_extended = {}
-        self.__listeners = set()
-
-    def __process_sensor_stream_data(self, sensor_data: List[float]):
-        data = {}
-
-        def __new_data():
-            n = {}
-            for name, component in components.items():
-                d = sensor_data.pop(0)
-                if component.modifier:
-                    d = component.modifier(d)
-                n[name] = d
-            data[sensor] = n
-
-        for sensor, components in self.__toy.sensors.items():
-            if sensor in self.__enabled:
-                __new_data()
-        for sensor, components in self.__toy.extended_sensors.items():
-            if sensor in self.__enabled_extended:
-                __new_data()
-
-        for f in self.__listeners:
-            threading.Thread(target=f, args=(data,)).start()
-
-    def add_sensor_data_listener(self, listener: Callable[[Dict[str, Dict[str, float]]], None]):
-        self.__listeners.add(listener)
-
-    def remove_sensor_data_listener(self, listener: Callable[[Dict[str, Dict[str, float]]], None]):
-        self.__listeners.remove(listener)
+        self.__decoder = self.__compile()
+        self.__core_time = None
+        self.__sent = None
+        self.__connection = None
+
+    def __compile(self) -> SensorDecoder:
+        sensors = [(sensor, components) for sensor, components in self.__toy.sensors.items()
+                   if sensor in self.__enabled]
+        sensors += [(sensor, components) for sensor, components in self.__toy.extended_sensors.items()
+                    if sensor in self.__enabled_extended]
+        return SensorDecoder(sensors, 'f')
+
+    def __process_sensor_stream_data(self, sensor_data: bytearray):
+        decoder = self.__decoder
+        values = decoder.values(sensor_data)
+        if values is None:
+            return
+        if self._wants_values:
+            core_time = self.__core_time
+            host_time, device_time = self.__toy.clock.timestamp(
+                time.monotonic(), None if core_time is None else values[core_time] / 1000)
+            self._publish_values(decoder.columns, values, host_time, device_time)
+        if self._wants_data:
+            self._publish_data(decoder.nest(values))
 
     def set_count(self, count: int):
         if count >= 0 and count != self.__count:
             self.__count = count
-            self.__update()
+            self._update()
 
     def set_interval(self, interval: int):
         if interval >= 0 and interval != self.__interval:
             self.__interval = interval
-            self.__update()
+            self._update()
 
-    def __update(self):
+    def _update(self):
+        if self._batching:
+            return
+        self.__decoder = self.__compile()
+        # The core time sensor streams the uptime of the toy in milliseconds along with each sample
+        columns = self.__decoder.columns
+        self.__core_time = columns.index('core_time.core_time') if 'core_time.core_time' in columns else None
         sensors_mask = extended_sensors_mask = 0
         for sensor in self.__enabled.values():
             for component in sensor.values():
@@ -305,9 +373,20 @@ class SensorControl:
         for sensor in self.__enabled_extended.values():
             for component in sensor.values():
                 extended_sensors_mask |= component.bit
-        self.__toy.set_sensor_streaming_mask(0, self.__count, sensors_mask)
-        self.__toy.set_extended_sensor_streaming_mask(extended_sensors_mask)
+        state = self.__interval, self.__count, sensors_mask, extended_sensors_mask
+        if self.__connection != self.__toy._connections:
+            # Nothing was sent over this connection yet, and the toy may have been restarted since
+            self.__connection, self.__sent = self.__toy._connections, None
+        sent = self.__sent
+        if state == sent:
+            return
+        # Streaming is stopped while the extended mask changes, which the toy only needs to hear about if it changed
+        if sent is None or extended_sensors_mask != sent[3]:
+            if sent is None or sent[0] and (sent[2] or sent[3]):
+                self.__toy.set_sensor_streaming_mask(0, self.__count, sensors_mask)
+            self.__toy.set_extended_sensor_streaming_mask(extended_sensors_mask)
         self.__toy.set_sensor_streaming_mask(self.__interval, self.__count, sensors_mask)
+        self.__sent = state
 
     def enable(self, *sensors):
         for sensor in sensors:
@@ -315,18 +394,18 @@ class SensorControl:
                 self.__enabled[sensor] = self.__toy.sensors[sensor]
             elif sensor in self.__toy.extended_sensors:
                 self.__enabled_extended[sensor] = self.__toy.extended_sensors[sensor]
-        self.__update()
+        self._update()
 
     def disable(self, *sensors):
         for sensor in sensors:
             self.__enabled.pop(sensor, None)
             self.__enabled_extended.pop(sensor, None)
-        self.__update()
+        self._update()
 
     def disable_all(self):
         self.__enabled.clear()
         self.__enabled_extended.clear()
-        self.__update()
+        self._update()
 
 
 class StatsControl:
@@ -352,6 +431,10 @@ class StreamingDataSizes(IntEnum):
     ThirtyTwoBit = 2
 
 
+# Services whose values are counters rather than measurements, which would be corrupted by scaling to smaller sizes
+_exact_services = frozenset(('core_time_lower', 'core_time_upper'))
+
+
 class StreamingService(NamedTuple):
     attributes: OrderedDict
     slot: int
@@ -359,6 +442,93 @@ class StreamingService(NamedTuple):
     data_size: StreamingDataSizes = StreamingDataSizes.ThirtyTwoBit
 
 
+class _StreamingLayout:
+    """Precomputed layout of the streaming services sharing a slot, decoding a packet with one :mod:`struct` unpack
+    and a scale and offset per value, or many packets at once with NumPy."""
+
+    __formats = {StreamingDataSizes.EightBit: 'B', StreamingDataSizes.SixteenBit: 'H',
+                 StreamingDataSizes.ThirtyTwoBit: 'I'}
+
+    def __init__(self, services, slot: int):
+        fmt = '>'
+        sizes = set()
+        self.services = []
+        self.columns = []
+        scales, offsets, modifiers = [], [], []
+        for _, name, service in services:
+            start = len(self.columns)
+            sizes.add(service.data_size)
+            for attribute, component in service.attributes.items():
+                fmt += self.__formats[service.data_size]
+                scales.append((component.max_value - component.min_value) / ((1 << 8 * (1 << service.data_size)) - 1))
+                offsets.append(component.min_value)
+                if component.modifier is not None:
+                    modifiers.append((len(self.columns), component.modifier))
+                self.columns.append(f'{name}.{attribute}')
+            if name != 'color_detection' or slot == 0:
+                self.services.append((name, tuple(service.attributes), start))
+        self.columns = tuple(self.columns)
+        self.__struct = struct.Struct(fmt)
+        # Slots whose values all have the same size are read with a single NumPy view
+        self.__dtype = f'>u{1 << sizes.pop()}' if len(sizes) == 1 else None
+        self.__scaling = tuple(zip(scales, offsets))
+        self.__scales = np.array(scales)
+        self.__offsets = np.array(offsets)
+        self.__modifiers = modifiers
+        self.__core_time = [self.columns.index(column) if column in self.columns else None
+                            for column in ('core_time_lower.time_lower', 'core_time_upper.time_upper')]
+        # Columns of the services passed on to every kind of listener, which are all of them but the color detection
+        # streamed outside of slot 0, whose values are not reported
+        kept = [i for _, attributes, start in self.services for i in range(start, start + len(attributes))]
+        self.__kept = None if len(kept) == len(self.columns) else kept
+        self.kept_columns = self.columns if self.__kept is None else tuple(self.columns[i] for i in kept)
+
+    def kept_values(self, values: List[float]) -> List[float]:
+        return values if self.__kept is None else [values[i] for i in self.__kept]
+
+    def device_time(self, values: List[float]) -> Optional[float]:
+        """Uptime of the toy in seconds when the packet was sampled, if the core time is streamed in this slot."""
+        lower, upper = self.__core_time
+        if lower is None:
+            return None
+        milliseconds = round(values[lower])
+        if upper is not None:
+            milliseconds += round(values[upper]) << 32
+        return milliseconds / 1000
+
+    def values(self, sensor_data) -> Optional[List[float]]:
+        if len(sensor_data) < self.__struct.size:
+            return None
+        values = [v * scale + offset
+                  for v, (scale, offset) in zip(self.__struct.unpack_from(sensor_data), self.__scaling)]
+        for i, modifier in self.__modifiers:
+            values[i] = modifier(values[i])
+        return values
+
+    def nest(self, values: List[float]) -> Dict[str, Dict[str, float]]:
+        return {name: dict(zip(attributes, values[start:start + len(attributes)]))
+                for name, attributes, start in self.services}
+
+    def decode(self, sensor_data) -> Optional[Dict[str, Dict[str, float]]]:
+        values = self.values(sensor_data)
+        if values is None:
+            return None
+        return self.nest(values)
+
+    def values_batch(self, payloads: Iterable[bytes]) -> np.ndarray:
+        """Values of many packets as an array with a row per packet and a column per value."""
+        size = self.__struct.size
+        buffer = b''.join(bytes(payload[:size]) for payload in payloads if len(payload) >= size)
+        if self.__dtype is None:
+            values = np.array(list(self.__struct.iter_unpack(buffer)), dtype=float)
+        else:
+            values = np.frombuffer(buffer, self.__dtype)
+        values = values.reshape(-1, len(self.columns)) * self.__scales + self.__offsets
+        for i, modifier in self.__modifiers:
+            values[:, i] = modifier(values[:, i])
+        return values
+
+
 class StreamingServiceState(Enum):
     Unknown = auto()
     Stop = auto()
@@ -366,7 +536,10 @@ class StreamingServiceState(Enum):
     Restart = auto()
 
 
-class StreamingControl:
+class StreamingControl(SensorListeners):
+    """Sensor control of toys with streaming services. Each slot of each processor is published with its own columns,
+    and packets of the slot streaming ``core_time_lower`` carry their device time."""
+
     __streaming_services = {
         'quaternion': StreamingService(OrderedDict(
             w=StreamingServiceAttribute(-1, 1),
@@ -396,7 +569,7 @@ class StreamingControl:
             y=StreamingServiceAttribute(-2000, 2000),
             z=StreamingServiceAttribute(-2000, 2000)
         ), 1),
-        'core_time_lower': StreamingService(OrderedDict(time_lower=StreamingServiceAttribute(0, 1 << 63)), 3),
+        'core_time_lower': StreamingService(OrderedDict(time_lower=StreamingServiceAttribute(0, (1 << 32) - 1)), 3),
         'locator': StreamingService(OrderedDict(
             x=StreamingServiceAttribute(-16000, 16000, lambda x: x * 100.),
             y=StreamingServiceAttribute(-16000, 16000, lambda x: x * 100.),
@@ -406,28 +579,39 @@ class StreamingControl:
             y=StreamingServiceAttribute(-5, 5, lambda x: x * 100.),
         ), 2),
         'speed': StreamingService(OrderedDict(speed=StreamingServiceAttribute(0, 5, lambda x: x * 100.)), 2),
-        'core_time_upper': StreamingService(OrderedDict(time_upper=StreamingServiceAttribute(0, 1 << 63)), 3),
+        'core_time_upper': StreamingService(OrderedDict(time_upper=StreamingServiceAttribute(0, (1 << 32) - 1)), 3),
         'ambient_light': StreamingService(
             OrderedDict(light=StreamingServiceAttribute(0, 120000)), 2, Processors.PRIMARY
         ),
     }
 
     def __init__(self, toy):
+        super().__init__(toy)
         toy.add_streaming_service_data_notify_listener(self.__streaming_service_data)
         self.__toy = toy
-        self.__slots = {
-            Processors.PRIMARY: defaultdict(list),
-            Processors.SECONDARY: defaultdict(list)
+        self.__layouts: Dict[Processors, Dict[int, _StreamingLayout]] = {
+            Processors.PRIMARY: {},
+            Processors.SECONDARY: {}
         }
         self.__enabled = set()
-        self.__listeners = set()
         self.__interval = 500
-
-    def add_sensor_data_listener(self, listener: Callable[[Dict[str, Dict[str, float]]], None]):
-        self.__listeners.add(listener)
-
-    def remove_sensor_data_listener(self, listener: Callable[[Dict[str, Dict[str, float]]], None]):
-        self.__listeners.remove(listener)
+        # Slot configurations and streaming interval last sent to each processor, to only update what changed. They
+        # are unknown until first configured over each connection, as the toy may keep slots from a previous one.
+        self.__configured: Dict[Processors, Optional[Dict[int, bytes]]] = {}
+        self.__streaming: Dict[Processors, Optional[int]] = {}
+        self.__connection = None
+        self.__data_sizes: Dict[str, StreamingDataSizes] = {}
+
+    def decode_batch(self, source_id: int, token: int,
+                     payloads: Iterable[bytes]) -> Dict[str, Dict[str, np.ndarray]]:
+        """Decodes the sensor data of many packets received from the same processor and slot at once, returning an
+        array of values for each component of each sensor."""
+        layout = self.__layouts[source_id & 0xf].get(token & 0xf)
+        if layout is None:
+            return {}
+        values = layout.values_batch(payloads)
+        return {name: {attribute: values[:, start + i] for i, attribute in enumerate(attributes)}
+                for name, attributes, start in layout.services}
 
     def enable(self, *sensors):
         changed = False
@@ -436,7 +620,7 @@ class StreamingControl:
                 self.__enabled.add(sensor)
                 changed = True
         if changed:
-            self.__configure(StreamingServiceState.Start)
+            self._update()
 
     def disable(self, *sensors):
         changed = False
@@ -445,65 +629,111 @@ class StreamingControl:
                 self.__enabled.remove(sensor)
                 changed = True
         if changed:
-            self.__configure(StreamingServiceState.Start if self.__enabled else StreamingServiceState.Stop)
+            self._update()
 
     def disable_all(self):
         if not self.__enabled:
             return
         self.__enabled.clear()
-        self.__configure(StreamingServiceState.Stop)
+        self._update()
 
     def set_count(self, count: int):
         pass
 
+    def set_precision(self, data_size: StreamingDataSizes, *sensors):
+        """Streams each component of the sensors in ``data_size``, instead of their default of 32 bits for most of
+        them. Smaller sizes make smaller packets, leaving room for faster intervals. The core time is only streamed in
+        32 bits, as it is read as an exact count of milliseconds."""
+        if data_size != StreamingDataSizes.ThirtyTwoBit:
+            exact = _exact_services.intersection(sensors)
+            if exact:
+                raise ValueError(f'{", ".join(sorted(exact))} can only be streamed in 32 bits')
+        for sensor in sensors:
+            if sensor in self.__streaming_services:
+                self.__data_sizes[sensor] = data_size
+        self._update()
+
+    def set_resolution(self, resolution: float, *sensors):
+        """Streams each of the sensors in the smallest size whose steps are no larger than ``resolution``, in the units
+        the sensor is reported in, or in 32 bits if none is fine enough. The core time is always streamed in 32 bits."""
+        with self.batch():
+            for sensor in sensors:
+                service = self.__streaming_services.get(sensor)
+                if service is None or sensor in _exact_services:
+                    continue
+                for data_size in StreamingDataSizes:
+                    if self.__resolution(service, data_size) <= resolution:
+                        break
+                self.set_precision(data_size, sensor)
+
+    @staticmethod
+    def __resolution(service: StreamingService, data_size: StreamingDataSizes) -> float:
+        steps = (1 << 8 * (1 << data_size)) - 1
+        resolution = 0.
+        for component in service.attributes.values():
+            step = (component.max_value - component.min_value) / steps
+            if component.modifier is not None:
+                step = abs(component.modifier(component.min_value + step) - component.modifier(component.min_value))
+            resolution = max(resolution, step)
+        return resolution
+
     def set_interval(self, interval: int):
         if interval < 0:
             raise ValueError('Interval attempted to be set with negative value')
         self.__interval = interval
-        if self.__enabled:
-            self.__configure(StreamingServiceState.Restart)
+        self._update()
 
-    def __configure(self, state: StreamingServiceState):
+    def _update(self):
+        """Brings each processor to the enabled sensors and interval, leaving processors whose slots did not change
+        untouched, and only adding the new slots when none of the configured ones changed."""
+        if self._batching:
+            return
+        if self.__connection != self.__toy._connections:
+            self.__connection = self.__toy._connections
+            self.__configured = {Processors.PRIMARY: None, Processors.SECONDARY: None}
+            self.__streaming = {Processors.PRIMARY: None, Processors.SECONDARY: None}
         for target in [Processors.PRIMARY, Processors.SECONDARY]:
-            self.__toy.stop_streaming_service(target)
-            if state == StreamingServiceState.Stop:
-                self.__toy.clear_streaming_service(target)
-            elif state == StreamingServiceState.Start:
-                self.__toy.clear_streaming_service(target)
-                slots = self.__slots[target]
-                slots.clear()
-                for index, (s, sensor) in enumerate(self.__streaming_services.items()):
-                    if s in self.__enabled and sensor.processor == target:
-                        slots[sensor.slot].append((index, s, sensor))
-                if slots:
-                    for slot, services in slots.items():
-                        data = []
-                        for index, _, sensor in services:
-                            data.extend(to_bytes(index, 2))
-                            data.append(sensor.data_size)
+            slots = defaultdict(list)
+            for index, (s, sensor) in enumerate(self.__streaming_services.items()):
+                if s in self.__enabled and sensor.processor == target:
+                    slots[sensor.slot].append((index, s, sensor._replace(
+                        data_size=self.__data_sizes.get(s, sensor.data_size))))
+            desired = {}
+            for slot, services in slots.items():
+                data = bytearray()
+                for index, _, sensor in services:
+                    data.extend(to_bytes(index, 2))
+                    data.append(sensor.data_size)
+                desired[slot] = bytes(data)
+            configured = self.__configured[target]
+            interval = self.__interval if desired else None
+            if desired == configured and interval == self.__streaming[target]:
+                continue
+            if self.__streaming[target] is not None or configured is None:
+                self.__toy.stop_streaming_service(target)
+                self.__streaming[target] = None
+            if desired != configured:
+                self.__layouts[target] = {slot: _StreamingLayout(services, slot) for slot, services in slots.items()}
+                if configured is None or any(desired.get(slot) != data for slot, data in configured.items()):
+                    self.__toy.clear_streaming_service(target)
+                    configured = self.__configured[target] = {}
+                for slot, data in desired.items():
+                    if slot not in configured:
                         self.__toy.configure_streaming_service(slot, data, target)
-                    self.__toy.start_streaming_service(self.__interval, target)
-            elif state == StreamingServiceState.Restart:
-                self.__toy.start_streaming_service(self.__interval, target)
+                        configured[slot] = data
+            if interval is not None:
+                self.__toy.start_streaming_service(interval, target)
+                self.__streaming[target] = interval
 
     def __streaming_service_data(self, source_id, data: StreamingServiceData):
-        node = data.token & 0xf
-        processor = source_id & 0xf
-        sensor_data = data.sensor_data
-        services = self.__slots[processor][node]
-        data = {}
-        for _, sensor_name, sensor in services:
-            n = {}
-            for name, component in sensor.attributes.items():
-                data_size = 1 << sensor.data_size
-                value, sensor_data = to_int(sensor_data[:data_size]), sensor_data[data_size:]
-                value = value / ((1 << data_size * 8) - 1) * (
-                        component.max_value - component.min_value) + component.min_value
-                if component.modifier is not None:
-                    value = component.modifier(value)
-                n[name] = value
-            if sensor_name == 'color_detection' and node != 0:
-                continue
-            data[sensor_name] = n
-        for f in self.__listeners:
-            threading.Thread(target=f, args=(data,)).start()
+        layout = self.__layouts[source_id & 0xf].get(data.token & 0xf)
+        if layout is None:
+            return
+        values = layout.values(data.sensor_data)
+        if values is None:
+            return
+        if self._wants_values:
+            host_time, device_time = self.__toy.clock.timestamp(time.monotonic(), layout.device_time(values))
+            self._publish_values(layout.kept_columns, layout.kept_values(values), host_time, device_time)
+        if self._wants_data:
+            self._publish_data(layout.nest(values))
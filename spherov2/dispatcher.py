@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum, auto
+from typing import Callable, Dict, Hashable, Optional
+
+
+class OverflowPolicy(Enum):
+    DROP_OLDEST = auto()
+    COALESCE_LATEST = auto()
+    BLOCK = auto()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class _Backlog:
+    __slots__ = ('calls', 'policy', 'max_pending', 'scheduled', 'dropped')
+
+    def __init__(self, policy, max_pending):
+        self.calls = deque()
+        self.policy = policy
+        self.max_pending = max_pending
+        self.scheduled = False
+        self.dropped = 0
+
+
+class ListenerDispatcher:
+    """Calls listeners on a bounded pool of worker threads instead of a new thread per call.
+
+    Calls to the same listener are run one at a time and in the order they were dispatched, while different listeners
+    run concurrently. Every listener has a backlog of at most ``max_pending`` calls, and ``policy`` decides what
+    happens when it is full: :attr:`OverflowPolicy.DROP_OLDEST` discards the oldest call,
+    :attr:`OverflowPolicy.COALESCE_LATEST` keeps only the newest one, and :attr:`OverflowPolicy.BLOCK` makes the
+    dispatching thread wait. Blocking should not be used for listeners that dispatch to themselves. Calls dispatched
+    from a thread running an event loop, like the one shared by Bleak connections, never block, as that would stall
+    every connection on it: :attr:`OverflowPolicy.DROP_OLDEST` applies instead."""
+
+    def __init__(self, max_workers: int = 8, max_pending: int = 256,
+                 policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST):
+        self.__executor = ThreadPoolExecutor(max_workers, thread_name_prefix='ListenerDispatcher')
+        self.__max_pending = max_pending
+        self.__policy = policy
+        self.__backlogs: Dict[Hashable, _Backlog] = {}
+        self.__lock = threading.Condition()
+
+    def set_policy(self, listener: Callable, policy: OverflowPolicy, max_pending: Optional[int] = None):
+        """Overrides the overflow policy and backlog size for a single listener."""
+        with self.__lock:
+            backlog = self.__backlog(listener)
+            backlog.policy = policy
+            if max_pending is not None:
+                backlog.max_pending = max_pending
+
+    def dropped(self, listener: Callable) -> int:
+        """Number of calls to the listener that were discarded or coalesced because its backlog was full."""
+        with self.__lock:
+            backlog = self.__backlogs.get(listener)
+            return backlog.dropped if backlog else 0
+
+    def dispatch(self, listener: Callable, *args, **kwargs):
+        with self.__lock:
+            backlog = self.__backlog(listener)
+            if len(backlog.calls) >= backlog.max_pending:
+                if backlog.policy == OverflowPolicy.BLOCK and not _on_event_loop():
+                    while len(backlog.calls) >= backlog.max_pending:
+                        self.__lock.wait()
+                elif backlog.policy == OverflowPolicy.COALESCE_LATEST:
+                    backlog.dropped += len(backlog.calls)
+                    backlog.calls.clear()
+                else:
+                    backlog.dropped += 1
+                    backlog.calls.popleft()
+            backlog.calls.append((args, kwargs))
+            if not backlog.scheduled:
+                backlog.scheduled = True
+                self.__executor.submit(self.__drain, listener, backlog)
+
+    def __backlog(self, listener):
+        backlog = self.__backlogs.get(listener)
+        if backlog is None:
+            backlog = self.__backlogs[listener] = _Backlog(self.__policy, self.__max_pending)
+        return backlog
+
+    def __drain(self, listener, backlog):
+        while True:
+            with self.__lock:
+                if not backlog.calls:
+                    backlog.scheduled = False
+                    return
+                args, kwargs = backlog.calls.popleft()
+                self.__lock.notify_all()
+            try:
+                listener(*args, **kwargs)
+            except Exception:
+                traceback.print_exc()
+
+    def shutdown(self, wait: bool = True):
+        self.__executor.shutdown(wait)
+
+
+class LoopDispatcher:
+    """Calls listeners on an asyncio event loop, in the order they were dispatched. Listeners that are coroutine
+    functions are scheduled as tasks. Toys use it for their listeners while they are in ``async with``."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.__loop = loop
+
+    def dispatch(self, listener: Callable, *args, **kwargs):
+        self.__loop.call_soon_threadsafe(self.__call, listener, args, kwargs)
+
+    def __call(self, listener, args, kwargs):
+        try:
+            result = listener(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                self.__loop.create_task(result)
+        except Exception:
+            traceback.print_exc()
+
+    def shutdown(self, wait: bool = True):
+        ...
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Hashable, Dict, List, Optional
+
+_learned_intervals: Dict[Hashable, float] = {}
+
+
+def learned_intervals() -> Dict[Hashable, float]:
+    """Intervals that :class:`AdaptivePacer` instances converged on, by profile (e.g. model and firmware version)."""
+    return dict(_learned_intervals)
+
+
+class PacerEvent(NamedTuple):
+    time: float
+    interval: float
+    reason: str
+
+
+class FixedPacer:
+    """Keeps at least ``interval`` seconds between two writes, which is the historical ``cmd_safe_interval`` pacing."""
+
+    def __init__(self, interval: float):
+        self.__interval = interval
+        self.__next_write = 0.
+
+    @property
+    def interval(self) -> float:
+        return self.__interval
+
+    @property
+    def rate(self) -> float:
+        return 1 / self.__interval if self.__interval else float('inf')
+
+    def delay(self) -> float:
+        """Seconds left before the next write is allowed."""
+        return max(self.__next_write - time.monotonic(), 0.)
+
+    def wait(self, key):
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_sent(self, key):
+        self.__next_write = time.monotonic() + self.__interval
+
+    def on_response(self, key, packet):
+        ...
+
+
+class AdaptivePacer:
+    """Pacing of writes driven by busy errors and response latency.
+
+    The interval is multiplied by ``backoff`` whenever the toy reports that it is busy, or when the smoothed response
+    latency grows beyond ``latency_tolerance`` times the best latency seen. After ``probe_after`` clean responses in a
+    row, the interval shrinks by ``probe_step`` to probe for a faster rate.
+
+    :param initial_interval: Interval to start from, usually the ``cmd_safe_interval`` of the toy type.
+    :param profile: Optional hashable key (such as ``(toy_type.display_name, firmware_version)``) under which the
+                    converged interval is remembered, so that new pacers with the same profile start from it.
+    """
+
+    def __init__(self, initial_interval: float, min_interval: float = .005, max_interval: float = .5,
+                 backoff: float = 2., probe_step: float = .1, probe_after: int = 20, latency_tolerance: float = 2.,
+                 profile: Optional[Hashable] = None, history_size: int = 256):
+        if profile is not None:
+            initial_interval = _learned_intervals.get(profile, initial_interval)
+        self.__interval = initial_interval
+        self.__min_interval = min_interval
+        self.__max_interval = max_interval
+        self.__backoff = backoff
+        self.__probe_step = probe_step
+        self.__probe_after = probe_after
+        self.__latency_tolerance = latency_tolerance
+        self.__profile = profile
+
+        self.__lock = threading.Lock()
+        self.__next_write = 0.
+        self.__sent = {}
+        self.__clean = 0
+        self.__latency = None
+        self.__best_latency = None
+        self.__history = deque(maxlen=history_size)
+        self.__history.append(PacerEvent(time.monotonic(), initial_interval, 'start'))
+
+    @property
+    def interval(self) -> float:
+        return self.__interval
+
+    @property
+    def rate(self) -> float:
+        return 1 / self.__interval
+
+    @property
+    def latency(self) -> Optional[float]:
+        """Exponentially smoothed response latency, in seconds."""
+        return self.__latency
+
+    @property
+    def history(self) -> List[PacerEvent]:
+        with self.__lock:
+            return list(self.__history)
+
+    def delay(self) -> float:
+        """Seconds left before the next write is allowed."""
+        return max(self.__next_write - time.monotonic(), 0.)
+
+    def wait(self, key):
+        delay = self.delay()
+        if delay > 0:
+            time.sleep(delay)
+        with self.__lock:
+            self.__sent[key] = time.monotonic()
+
+    def on_sent(self, key):
+        with self.__lock:
+            self.__next_write = time.monotonic() + self.__interval
+
+    def on_response(self, key, packet):
+        now = time.monotonic()
+        with self.__lock:
+            sent = self.__sent.pop(key, None)
+            if sent is None:
+                return
+            if packet.busy:
+                self.__adjust(self.__interval * self.__backoff, 'busy')
+                return
+            latency = now - sent
+            self.__latency = latency if self.__latency is None else self.__latency * .875 + latency * .125
+            if self.__best_latency is None or latency < self.__best_latency:
+                self.__best_latency = latency
+            if self.__latency > self.__best_latency * self.__latency_tolerance + self.__min_interval:
+                self.__latency = None
+                self.__adjust(self.__interval * (1 + self.__backoff) / 2, 'latency')
+                return
+            self.__clean += 1
+            if self.__clean >= self.__probe_after:
+                self.__adjust(self.__interval * (1 - self.__probe_step), 'probe')
+
+    def __adjust(self, interval, reason):
+        self.__clean = 0
+        interval = min(self.__max_interval, max(self.__min_interval, interval))
+        self.__next_write += interval - self.__interval
+        self.__interval = interval
+        self.__history.append(PacerEvent(time.monotonic(), interval, reason))
+        if self.__profile is not None:
+            _learned_intervals[self.__profile] = interval
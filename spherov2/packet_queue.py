@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from queue import Empty
+from typing import Callable, Hashable, Optional, NamedTuple, Dict, List
+
+
+_dropped = object()
+
+
+class Priority(IntEnum):
+    SAFETY = 0
+    MOTION = 1
+    CONFIG = 2
+    BULK = 3
+
+
+class LaneStats(NamedTuple):
+    count: int
+    total_wait: float
+    max_wait: float
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.count if self.count else 0.
+
+
+class PacketQueue:
+    """Outgoing packet queue of a toy.
+
+    Packets are taken from the lane with the highest :class:`Priority` first, and in order within a lane. Packets put
+    with a coalescing key replace the packet with the same key that is still waiting to be written, so that only the
+    latest value of a state command (like a drive setpoint or an LED color) reaches the toy. The replacing packet keeps
+    the place of its predecessor if they share a lane, and is queued at the end of its own lane otherwise. A packet can
+    also supersede any waiting packet, like a stop dropping the drive setpoints queued before it."""
+
+    def __init__(self):
+        self.__lanes = {priority: deque() for priority in Priority}
+        self.__stats = {priority: [0, 0., 0.] for priority in Priority}
+        self.__size = 0
+        self.__coalescing = {}
+        self.__not_empty = threading.Condition()
+        self.coalesced = 0
+
+    def __len__(self):
+        return self.__size
+
+    def put(self, packet, priority: Priority = Priority.CONFIG, coalescing_key: Optional[Hashable] = None,
+            supersedes: Optional[Callable[[object], bool]] = None) -> List:
+        """Queues the packet, returning the packets it replaced: the one with the same coalescing key, and those for
+        which ``supersedes`` is true."""
+        with self.__not_empty:
+            replaced = []
+            if supersedes is not None:
+                for lane in self.__lanes.values():
+                    for entry in lane:
+                        if entry[0] is not _dropped and supersedes(entry[0]):
+                            replaced.append(entry[0])
+                            self.__drop(entry)
+            if coalescing_key is not None:
+                entry = self.__coalescing.get(coalescing_key)
+                if entry is not None:
+                    replaced.append(entry[0])
+                    self.coalesced += 1
+                    if entry[2] == priority:
+                        entry[0] = packet
+                        return replaced
+                    self.__drop(entry)
+            entry = [packet, coalescing_key, priority, time.monotonic()]
+            if coalescing_key is not None:
+                self.__coalescing[coalescing_key] = entry
+            self.__lanes[priority].append(entry)
+            self.__size += 1
+            self.__not_empty.notify()
+        return replaced
+
+    def __drop(self, entry):
+        entry[0] = _dropped
+        if entry[1] is not None and self.__coalescing.get(entry[1]) is entry:
+            del self.__coalescing[entry[1]]
+        self.__size -= 1
+
+    def get(self, block: bool = True):
+        """Takes the next packet, waiting for one if ``block`` is set, or raising :class:`queue.Empty` otherwise."""
+        with self.__not_empty:
+            while True:
+                while not self.__size:
+                    if not block:
+                        raise Empty
+                    self.__not_empty.wait()
+                for priority, lane in self.__lanes.items():
+                    while lane:
+                        packet, coalescing_key, _, queued = entry = lane.popleft()
+                        if coalescing_key is not None and self.__coalescing.get(coalescing_key) is entry:
+                            del self.__coalescing[coalescing_key]
+                        if packet is _dropped:
+                            continue
+                        self.__size -= 1
+                        wait = time.monotonic() - queued
+                        stats = self.__stats[priority]
+                        stats[0] += 1
+                        stats[1] += wait
+                        stats[2] = max(stats[2], wait)
+                        return packet
+
+    def stats(self) -> Dict[Priority, LaneStats]:
+        """Number of packets taken from each lane, and how long they waited in it, in seconds."""
+        with self.__not_empty:
+            return {priority: LaneStats(*stats) for priority, stats in self.__stats.items()}
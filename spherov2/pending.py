@@ -0,0 +1,160 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent import futures
+from typing import Hashable, NamedTuple, Optional
+
+_tables = weakref.WeakSet()
+_tables_lock = threading.Lock()
+_sweeper: Optional[threading.Thread] = None
+_sweep_interval = .5
+
+
+def _sweep():
+    while True:
+        time.sleep(_sweep_interval)
+        with _tables_lock:
+            tables = list(_tables)
+        for table in tables:
+            table.expire()
+
+
+class PendingStats(NamedTuple):
+    pending: int
+    resolved: int
+    timed_out: int
+    late: int
+    overflowed: int
+
+
+class PendingRequests:
+    """Futures waiting for packets, keyed by packet id, each with a deadline.
+
+    Futures past their deadline fail with :class:`TimeoutError` and are removed, either when the table is next used or
+    by a sweeper thread shared by all tables. The key of an expired request is remembered for another ``timeout``
+    seconds, so that its late response is dropped rather than resolving a newer request, until a new request reuses the
+    same sequence number and claims its responses again. At most ``max_pending`` futures are kept, the oldest failing first when the table is full."""
+
+    def __init__(self, timeout: float, max_pending: int = 1024):
+        self.__timeout = timeout
+        self.__max_pending = max_pending
+        self.__entries = OrderedDict()
+        self.__expired = {}
+        self.__size = 0
+        self.__next_deadline = float('inf')
+        self.__resolved = self.__timed_out = self.__late = self.__overflowed = 0
+        self.__lock = threading.Lock()
+
+        global _sweeper
+        with _tables_lock:
+            _tables.add(self)
+            if _sweeper is None:
+                _sweeper = threading.Thread(target=_sweep, name='PendingRequests', daemon=True)
+                _sweeper.start()
+
+    def __len__(self):
+        return self.__size
+
+    def add(self, key: Hashable, timeout: Optional[float] = None, future: Optional[futures.Future] = None,
+            request: bool = True):
+        """Registers a future to be resolved with the next packet with the key, returning it. Unless ``request`` is
+        set, as when waiting for notifications, the key is not remembered after the future expires."""
+        if future is None:
+            future = futures.Future()
+        now = time.monotonic()
+        deadline = now + (self.__timeout if timeout is None else timeout)
+        with self.__lock:
+            if now >= self.__next_deadline:
+                self.__expire(now)
+            if self.__size >= self.__max_pending:
+                oldest_key, oldest = next(iter(self.__entries.items()))
+                self.__fail(oldest_key, oldest.popleft(), now)
+                self.__overflowed += 1
+                if not oldest:
+                    del self.__entries[oldest_key]
+            if request:
+                self.__expired.pop(key, None)
+            entries = self.__entries.get(key)
+            if entries is None:
+                entries = self.__entries[key] = deque()
+            entries.append((future, deadline, request))
+            self.__size += 1
+            self.__next_deadline = min(self.__next_deadline, deadline)
+        return future
+
+    def resolve(self, key: Hashable, packet) -> bool:
+        """Resolves every future waiting for the key with the packet, unless it is the late response of an expired
+        request. Returns whether the packet was expected."""
+        now = time.monotonic()
+        with self.__lock:
+            if now >= self.__next_deadline:
+                self.__expire(now)
+            if self.__expired.pop(key, None) is not None:
+                self.__late += 1
+                return True
+            entries = self.__entries.pop(key, None)
+            if entries is None:
+                return False
+            self.__size -= len(entries)
+            self.__resolved += len(entries)
+        for future, *_ in entries:
+            if not future.done():
+                future.set_result(packet)
+        return True
+
+    def transfer(self, key: Hashable, new_key: Hashable, result=None):
+        """Moves the futures waiting for the key to the new key, or resolves them with ``result`` if the new key is
+        ``None``."""
+        with self.__lock:
+            entries = self.__entries.pop(key, None)
+            if entries is None:
+                return
+            if new_key is None:
+                self.__size -= len(entries)
+            else:
+                self.__entries.setdefault(new_key, deque()).extend(entries)
+        if new_key is None:
+            for future, *_ in entries:
+                if not future.done():
+                    future.set_result(result)
+
+    def expire(self):
+        """Fails the futures past their deadline."""
+        now = time.monotonic()
+        with self.__lock:
+            if now >= self.__next_deadline:
+                self.__expire(now)
+
+    def __expire(self, now):
+        for key in [key for key, deadline in self.__expired.items() if deadline <= now]:
+            del self.__expired[key]
+        for key, entries in list(self.__entries.items()):
+            if all(entry[1] > now for entry in entries):
+                continue
+            for entry in entries:
+                if entry[1] <= now:
+                    self.__fail(key, entry, now)
+            alive = deque(entry for entry in entries if entry[1] > now)
+            if alive:
+                self.__entries[key] = alive
+            else:
+                del self.__entries[key]
+        self.__next_deadline = min((entry[1] for entries in self.__entries.values() for entry in entries),
+                                   default=float('inf'))
+        if self.__expired:
+            self.__next_deadline = min(self.__next_deadline, *self.__expired.values())
+
+    def __fail(self, key, entry, now):
+        future, _, request = entry
+        self.__size -= 1
+        self.__timed_out += 1
+        if request:
+            self.__expired[key] = now + self.__timeout
+            self.__next_deadline = min(self.__next_deadline, now + self.__timeout)
+        if not future.done():
+            future.set_exception(TimeoutError(f'No response for {key}'))
+
+    def stats(self) -> PendingStats:
+        with self.__lock:
+            return PendingStats(self.__size, self.__resolved, self.__timed_out, self.__late, self.__overflowed)
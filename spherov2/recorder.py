@@ -0,0 +1,116 @@
+import mmap
+import struct
+import threading
+import time
+from enum import IntEnum
+from typing import BinaryIO, Iterator, NamedTuple, Union
+
+_MAGIC = b'SPHEROV2LOG\x01'
+_header = struct.Struct('<dBBH')
+
+
+class RecordKind(IntEnum):
+    NOTIFICATION = 0
+    WRITE = 1
+    UUID = 2
+
+
+class Record(NamedTuple):
+    time: float
+    kind: RecordKind
+    uuid: str
+    data: bytes
+
+
+class Recorder:
+    """Append-only binary log of the raw traffic of a toy, given to it as ``Toy(..., recorder=Recorder(path))``.
+
+    Every notification received and every chunk written is logged with the seconds elapsed since the recorder was
+    created. Records are buffered and written out in chunks of ``chunk_size`` bytes, and on :meth:`close`. Each record
+    is a little-endian ``<dBBH`` header of time, kind, characteristic and data length, followed by the data;
+    characteristics are numbered by :attr:`RecordKind.UUID` records preceding their first use."""
+
+    def __init__(self, file: Union[str, BinaryIO], chunk_size: int = 1 << 16):
+        if isinstance(file, str):
+            self.__file = open(file, 'wb')
+            self.__owned = True
+        else:
+            self.__file = file
+            self.__owned = False
+        self.__chunk_size = chunk_size
+        self.__chunk = bytearray(_MAGIC)
+        self.__uuids = {}
+        self.__start = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def notification(self, uuid: str, data):
+        self.__record(RecordKind.NOTIFICATION, uuid, data)
+
+    def write(self, uuid: str, data):
+        self.__record(RecordKind.WRITE, uuid, data)
+
+    def __record(self, kind, uuid, data):
+        with self.__lock:
+            now = time.monotonic() - self.__start
+            index = self.__uuids.get(uuid)
+            if index is None:
+                index = self.__uuids[uuid] = len(self.__uuids)
+                encoded = uuid.encode('ascii')
+                self.__chunk += _header.pack(now, RecordKind.UUID, index, len(encoded))
+                self.__chunk += encoded
+            self.__chunk += _header.pack(now, kind, index, len(data))
+            self.__chunk += data
+            if len(self.__chunk) >= self.__chunk_size:
+                self.__flush()
+
+    def __flush(self):
+        self.__file.write(self.__chunk)
+        self.__chunk.clear()
+
+    def flush(self):
+        with self.__lock:
+            self.__flush()
+            self.__file.flush()
+
+    def close(self):
+        self.flush()
+        if self.__owned:
+            self.__file.close()
+
+
+def read_log(path: str, use_mmap: bool = True) -> Iterator[Record]:
+    """Yields the records of a log written by :class:`Recorder`, memory-mapping it unless ``use_mmap`` is cleared.
+    A record cut short by an interrupted recording ends the log."""
+    with open(path, 'rb') as f:
+        if use_mmap:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty files cannot be mapped
+                buffer = b''
+        else:
+            buffer = f.read()
+    try:
+        if buffer[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f'{path} is not a recorded log')
+        uuids = {}
+        offset, end = len(_MAGIC), len(buffer)
+        while offset + _header.size <= end:
+            timestamp, kind, index, size = _header.unpack_from(buffer, offset)
+            offset += _header.size
+            if offset + size > end:
+                break
+            data = buffer[offset:offset + size]
+            offset += size
+            if kind == RecordKind.UUID:
+                uuids[index] = data.decode('ascii')
+            else:
+                yield Record(timestamp, RecordKind(kind), uuids[index], data)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
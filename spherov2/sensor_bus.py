@@ -0,0 +1,125 @@
+import math
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+
+class SensorSample(NamedTuple):
+    topic: str
+    data: Any
+    host_time: float
+    device_time: Optional[float]
+
+
+def vertical_acceleration(attitude: Dict[str, float], accelerometer: Dict[str, float]) -> float:
+    """Acceleration along the vertical axis of the world in g, from the attitude of the toy in degrees.
+
+    The attitude is the rotation ``Ry(yaw) Rx(pitch) Rz(roll)``, whose inverse is its transpose, so only the dot
+    product of its second column with the acceleration is computed."""
+    roll, pitch, yaw = math.radians(attitude['roll']), math.radians(attitude['pitch']), math.radians(attitude['yaw'])
+    sr, cr = math.sin(roll), math.cos(roll)
+    sp, cp = math.sin(pitch), math.cos(pitch)
+    sy, cy = math.sin(yaw), math.cos(yaw)
+    return -((sy * sp * cr - cy * sr) * accelerometer['x'] - cp * cr * accelerometer['z'] +
+             (sy * sr + cy * sp * cr) * accelerometer['y'])
+
+
+def vertical_acceleration_batch(attitude: Dict[str, np.ndarray], accelerometer: Dict[str, np.ndarray]) -> np.ndarray:
+    """:func:`vertical_acceleration` of many samples at once, as decoded by
+    :meth:`spherov2.controls.v2.StreamingControl.decode_batch`."""
+    roll, pitch, yaw = np.radians(attitude['roll']), np.radians(attitude['pitch']), np.radians(attitude['yaw'])
+    sr, cr = np.sin(roll), np.cos(roll)
+    sp, cp = np.sin(pitch), np.cos(pitch)
+    sy, cy = np.sin(yaw), np.cos(yaw)
+    return -((sy * sp * cr - cy * sr) * accelerometer['x'] - cp * cr * accelerometer['z'] +
+             (sy * sr + cy * sp * cr) * accelerometer['y'])
+
+
+class SensorBus:
+    """Publish/subscribe bus of the sensor samples of a toy, keyed by topic: the name of a streamed sensor, like
+    ``accelerometer`` or ``locator``, or of a sensor derived from others, like ``vertical_accel``.
+
+    Sensor controls publish each decoded sample once, and the bus only builds the data of the topics someone
+    subscribed to, once for all of their subscribers. Subscribers are called by the dispatcher of the toy with a
+    :class:`SensorSample`, whose data is a dict of the components of the sensor, or the value of a derived sensor."""
+
+    def __init__(self, toy):
+        self.__toy = toy
+        self.__subscribers: Dict[Optional[str], List[Callable[[SensorSample], None]]] = defaultdict(list)
+        self.__derived: List[Tuple[str, Tuple[str, ...], Callable]] = []
+        self.__latest: Dict[str, Any] = {}
+        self.__plans: Dict[Tuple[str, ...], List[Tuple[str, List[Tuple[str, int]]]]] = {}
+        self.__lock = threading.Lock()
+        self.derive('vertical_accel', ('attitude', 'accelerometer'), vertical_acceleration)
+        self.derive('vertical_accel', ('imu', 'accelerometer'), vertical_acceleration)
+
+    @property
+    def active(self) -> bool:
+        """Whether anyone subscribed, so that samples need to be published."""
+        return bool(self.__subscribers)
+
+    def subscribe(self, listener: Callable[[SensorSample], None], *topics: str):
+        """Calls the listener with the samples of the topics, or of every topic if none is given."""
+        with self.__lock:
+            for topic in topics or (None,):
+                self.__subscribers[topic].append(listener)
+            self.__plans.clear()
+
+    def unsubscribe(self, listener: Callable[[SensorSample], None], *topics: str):
+        with self.__lock:
+            for topic in topics or (None,):
+                listeners = self.__subscribers.get(topic)
+                if listeners and listener in listeners:
+                    listeners.remove(listener)
+                    if not listeners:
+                        del self.__subscribers[topic]
+            self.__plans.clear()
+
+    def derive(self, topic: str, sources: Tuple[str, ...], function: Callable[..., Any]):
+        """Publishes ``function`` of the latest data of each of the source topics under the topic, whenever samples
+        of the sources are published and each of them has been received once."""
+        with self.__lock:
+            self.__derived.append((topic, sources, function))
+            self.__plans.clear()
+
+    def __wanted(self, topic: str) -> bool:
+        return None in self.__subscribers or topic in self.__subscribers
+
+    def __plan(self, columns: Tuple[str, ...]):
+        sources = {source for topic, sources, _ in self.__derived if self.__wanted(topic) for source in sources}
+        plan = []
+        for i, column in enumerate(columns):
+            topic, component = column.split('.', 1)
+            if not self.__wanted(topic) and topic not in sources:
+                continue
+            if not plan or plan[-1][0] != topic:
+                plan.append((topic, []))
+            plan[-1][1].append((component, i))
+        return plan
+
+    def publish(self, columns: Tuple[str, ...], values: List[float], host_time: float, device_time: Optional[float]):
+        """Publishes a sample decoded by a sensor control, with values named by the ``sensor.component`` columns."""
+        with self.__lock:
+            plan = self.__plans.get(columns)
+            if plan is None:
+                plan = self.__plans[columns] = self.__plan(columns)
+            if not plan:
+                return
+            samples = []
+            for topic, components in plan:
+                data = {component: values[i] for component, i in components}
+                self.__latest[topic] = data
+                samples.append(SensorSample(topic, data, host_time, device_time))
+            published = {topic for topic, _ in plan}
+            for topic, sources, function in self.__derived:
+                if self.__wanted(topic) and published.intersection(sources) and \
+                        all(source in self.__latest for source in sources):
+                    samples.append(SensorSample(topic, function(*(self.__latest[source] for source in sources)),
+                                                host_time, device_time))
+            calls = [(listener, sample) for sample in samples
+                     for listener in self.__subscribers.get(sample.topic, []) + self.__subscribers.get(None, [])]
+        dispatcher = self.__toy.dispatcher
+        for listener, sample in calls:
+            dispatcher.dispatch(listener, sample)
@@ -0,0 +1,93 @@
+import threading
+import time
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class SensorHistory:
+    """Preallocated ring buffer of the sensor samples streamed by a toy, with a row per sample and a column per sensor
+    component (like ``'accelerometer.x'``), after the ``host_time`` and ``device_time`` columns.
+
+    Every row is written twice, ``capacity`` rows apart, so that appending is O(1) and any window of up to
+    ``capacity`` consecutive samples is a contiguous slice. Queries therefore return views into the buffer without
+    copying; they are overwritten as new samples arrive, so copy them if they have to outlive ``capacity`` samples.
+    Columns are added when a control streams new components, and are ``NaN`` in rows that do not have them."""
+
+    def __init__(self, capacity: int = 4096):
+        self.__capacity = capacity
+        self.__columns = ('host_time', 'device_time')
+        self.__indices = {name: i for i, name in enumerate(self.__columns)}
+        self.__data = np.full((2 * capacity, len(self.__columns)), np.nan)
+        self.__count = 0
+        self.__lock = threading.Lock()
+        self.__layouts = {}
+
+    def __len__(self):
+        return min(self.__count, self.__capacity)
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return self.__columns
+
+    def index(self, column: str) -> int:
+        return self.__indices[column]
+
+    def attach(self, control):
+        """Records the samples of a ``SensorControl`` or ``StreamingControl``."""
+        control.add_sensor_values_listener(self.append)
+
+    def detach(self, control):
+        control.remove_sensor_values_listener(self.append)
+
+    def append(self, columns: Sequence[str], values: Sequence[float], host_time: Optional[float] = None,
+               device_time: Optional[float] = None):
+        """Appends a sample, timestamped with :func:`time.monotonic` unless ``host_time`` is given."""
+        with self.__lock:
+            if host_time is None:
+                host_time = time.monotonic()
+            layout = self.__layouts.get(columns)
+            if layout is None:
+                layout = self.__layouts[columns] = self.__layout(columns)
+            data, i = self.__data, self.__count % self.__capacity
+            data[i] = np.nan
+            data[i, 0] = host_time
+            if device_time is not None:
+                data[i, 1] = device_time
+            data[i, layout] = values
+            data[i + self.__capacity] = data[i]
+            self.__count += 1
+
+    def __layout(self, columns) -> np.ndarray:
+        new = [column for column in columns if column not in self.__indices]
+        if new:
+            for column in new:
+                self.__indices[column] = len(self.__columns)
+                self.__columns += (column,)
+            self.__data = np.hstack((self.__data, np.full((2 * self.__capacity, len(new)), np.nan)))
+        return np.array([self.__indices[column] for column in columns], dtype=int)
+
+    def last(self, n: Optional[int] = None) -> np.ndarray:
+        """View of the last ``n`` samples (all of them by default), oldest first."""
+        with self.__lock:
+            size = min(self.__count, self.__capacity)
+            n = size if n is None else max(0, min(n, size))
+            end = self.__count % self.__capacity + (self.__capacity if self.__count >= self.__capacity else 0)
+            return self.__data[end - n:end]
+
+    def since(self, host_time: float) -> np.ndarray:
+        """View of the samples recorded at or after ``host_time``, oldest first."""
+        window = self.last()
+        return window[np.searchsorted(window[:, 0], host_time):]
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """View of one column of the last ``n`` samples."""
+        return self.last(n)[:, self.__indices[name]]
+
+    def clear(self):
+        with self.__lock:
+            self.__count = 0
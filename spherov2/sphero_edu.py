@@ -1,19 +1,20 @@
+import asyncio
 import math
 import threading
 import time
 from collections import namedtuple, defaultdict
+from contextlib import nullcontext
 from enum import Enum, IntEnum, auto
 from functools import partial
 from typing import Union, Callable, Dict, Iterable, List
 
-import numpy as np
-from transforms3d.euler import euler2mat
-
 from spherov2.commands.animatronic import R2LegActions
 from spherov2.commands.io import IO, FrameRotationOptions, FadeOverrideOptions
 from spherov2.commands.power import BatteryVoltageAndStateStates
 from spherov2.controls import RawMotorModes
 from spherov2.helper import bound_value, bound_color
+from spherov2.sensor_bus import SensorSample
+from spherov2.sensor_history import SensorHistory
 from spherov2.toy import Toy
 from spherov2.toy.bb8 import BB8
 from spherov2.toy.bb9e import BB9E
@@ -104,6 +105,8 @@ class SpheroEduAPI:
         self.__last_message = None
         self.__should_land = self.__free_falling = False
         self.__compass_zero = None
+        self.__sensor_history = SensorHistory()
+        self.__history_control = None
 
         self.__listeners = defaultdict(set)
         ToyUtil.add_listeners(toy, self)
@@ -112,6 +115,7 @@ class SpheroEduAPI:
         self.__stopped.set()
         self.__updating = threading.Lock()
         self.__thread = None
+        self.__task = None
 
     def __enter__(self):
         self.__stopped.clear()
@@ -120,8 +124,8 @@ class SpheroEduAPI:
         self.__thread.start()
         try:
             self.__toy.wake()
-            ToyUtil.set_robot_state_on_start(self.__toy)
-            self.__start_capturing_sensor_data()
+            self.__synchronize_clock()
+            self.__start()
         except:
             self.__exit__(None, None, None)
             raise
@@ -130,16 +134,86 @@ class SpheroEduAPI:
     def __exit__(self, *args):
         self.__stopped.set()
         self.__thread.join()
+        self.__stop_capturing_sensor_data()
         try:
             ToyUtil.sleep(self.__toy)
         except:
             pass
         self.__toy.__exit__(*args)
 
+    async def __aenter__(self):
+        """Connects within the running event loop, where the ``*_async`` variants of the timed helpers, and of those
+        waiting for an answer of the toy like :func:`get_luminosity_direct` or :func:`calibrate_compass`, must be
+        used instead of their blocking counterparts. Getters of streamed sensor data and of the state set on the toy
+        return immediately, and can be used as usual."""
+        await self.__toy.__aenter__()
+        self.__stopped.clear()
+        self.__task = asyncio.get_running_loop().create_task(self.__background_async())
+        try:
+            self.__toy.wake()
+            await self.__run_blocking(self.__synchronize_clock)
+            self.__start()
+        except:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, *args):
+        self.__stopped.set()
+        self.__task.cancel()
+        self.__stop_capturing_sensor_data()
+        try:
+            ToyUtil.sleep(self.__toy)
+        except:
+            pass
+        await self.__toy.__aexit__(*args)
+
+    def __start(self):
+        # Streaming is configured once for both the interval set on start and the sensors captured
+        sensor_control = getattr(self.__toy, 'sensor_control', None)
+        with sensor_control.batch() if hasattr(sensor_control, 'batch') else nullcontext():
+            ToyUtil.set_robot_state_on_start(self.__toy)
+            self.__start_capturing_sensor_data()
+
     def __background(self):
+        ticks = 0
         while not self.__stopped.wait(0.8):
             with self.__updating:
                 self.__update_speeds()
+            ticks += 1
+            if ticks % 12 == 0:
+                self.__synchronize_clock()
+
+    def __synchronize_clock(self):
+        try:
+            ToyUtil.synchronize_clock(self.__toy)
+        except Exception:
+            pass
+
+    async def __background_async(self):
+        ticks = 0
+        while not self.__stopped.is_set():
+            await asyncio.sleep(0.8)
+            if self.__updating.acquire(False):
+                try:
+                    self.__update_speeds()
+                finally:
+                    self.__updating.release()
+            ticks += 1
+            if ticks % 12 == 0:
+                await self.__run_blocking(self.__synchronize_clock)
+
+    @staticmethod
+    async def __run_blocking(function, *args):
+        # Commands called outside of the event loop wait for their responses as usual
+        return await asyncio.get_running_loop().run_in_executor(None, partial(function, *args))
+
+    async def __acquire_updating(self):
+        while not self.__updating.acquire(False):
+            await asyncio.sleep(self.__toy.toy_type.cmd_safe_interval)
+
+    async def __step(self):
+        await asyncio.sleep(self.__toy.toy_type.cmd_safe_interval)
 
     def _will_sleep_notify(self):
         ToyUtil.ping(self.__toy)
@@ -162,6 +236,17 @@ class SpheroEduAPI:
     def roll(self, heading: int, speed: int, duration: float):
         """Combines heading(0-360°), speed(-255-255), and duration to make the robot roll with one line of code.
         For example, to have the robot roll at 90°, at speed 200 for 2s, use ``roll(90, 200, 2)``"""
+        self.__start_roll(heading, speed)
+        time.sleep(duration)
+        self.stop_roll()
+
+    async def roll_async(self, heading: int, speed: int, duration: float):
+        """Like :func:`roll`, without blocking the event loop."""
+        self.__start_roll(heading, speed)
+        await asyncio.sleep(duration)
+        self.stop_roll()
+
+    def __start_roll(self, heading: int, speed: int):
         if isinstance(self.__toy, Mini) and speed != 0:
             speed = round((speed + 126) * 2 / 3) if speed > 0 else round((speed - 126) * 2 / 3)
         self.__speed = bound_value(-255, speed, 255)
@@ -169,8 +254,6 @@ class SpheroEduAPI:
         if speed < 0:
             self.__heading = (self.__heading + 180) % 360
         self.__update_speed()
-        time.sleep(duration)
-        self.stop_roll()
 
     def __update_speed(self):
         ToyUtil.roll_start(self.__toy, self.__heading, self.__speed)
@@ -210,7 +293,33 @@ class SpheroEduAPI:
 
         if angle == 0:
             return
+        abs_angle = abs(angle)
+        duration = self.__spin_duration(abs_angle, duration)
+
+        start = time.time()
+        angle_gone = 0
+        with self.__updating:
+            while angle_gone < abs_angle:
+                angle_gone += self.__spin_step(angle, abs_angle, angle_gone, (time.time() - start) / duration)
+
+    async def spin_async(self, angle: int, duration: float):
+        """Like :func:`spin`, without blocking the event loop."""
+        if angle == 0:
+            return
+        abs_angle = abs(angle)
+        duration = self.__spin_duration(abs_angle, duration)
 
+        start = time.time()
+        angle_gone = 0
+        await self.__acquire_updating()
+        try:
+            while angle_gone < abs_angle:
+                angle_gone += self.__spin_step(angle, abs_angle, angle_gone, (time.time() - start) / duration)
+                await self.__step()
+        finally:
+            self.__updating.release()
+
+    def __spin_duration(self, abs_angle: int, duration: float) -> float:
         time_pre_rev = .45
 
         if isinstance(self.__toy, RVR):
@@ -222,16 +331,12 @@ class SpheroEduAPI:
         elif isinstance(self.__toy, Ollie):
             time_pre_rev = .6
 
-        abs_angle = abs(angle)
-        duration = max(duration, time_pre_rev * abs_angle / 360)
+        return max(duration, time_pre_rev * abs_angle / 360)
 
-        start = time.time()
-        angle_gone = 0
-        with self.__updating:
-            while angle_gone < abs_angle:
-                delta = round(min((time.time() - start) / duration, 1.) * abs_angle) - angle_gone
-                self.set_heading(self.__heading + delta if angle > 0 else self.__heading - delta)
-                angle_gone += delta
+    def __spin_step(self, angle: int, abs_angle: int, angle_gone: int, frac: float) -> int:
+        delta = round(min(frac, 1.) * abs_angle) - angle_gone
+        self.set_heading(self.__heading + delta if angle > 0 else self.__heading - delta)
+        return delta
 
     def set_stabilization(self, stabilize: bool):
         """Turns the stabilization system on and ``set_stabilization(false)`` turns it off.
@@ -266,17 +371,31 @@ class SpheroEduAPI:
         this command. This is different from :func:`set_speed` because Raw Motor sends an "Electromotive force"
         to the motors, whereas Set Speed is a target speed measured by the encoders. For example, to set the raw motor
         to full power for 4s, making the robot jump off the ground, use ``raw_motor(255, 255, 4)``."""
+        stabilize = self.__start_raw_motor(left, right)
+        if duration is not None:
+            time.sleep(duration)
+            self.__stop_raw_motor(stabilize)
+
+    async def raw_motor_async(self, left: int, right: int, duration: float):
+        """Like :func:`raw_motor`, without blocking the event loop."""
+        stabilize = self.__start_raw_motor(left, right)
+        if duration is not None:
+            await asyncio.sleep(duration)
+            self.__stop_raw_motor(stabilize)
+
+    def __start_raw_motor(self, left: int, right: int) -> bool:
         stabilize = self.__stabilization
         if stabilize:
             self.set_stabilization(False)
         self.__raw_motor = rawMotor(bound_value(-255, left, 255), bound_value(-255, right, 255))
         self.__update_raw_motor()
-        if duration is not None:
-            time.sleep(duration)
-            if stabilize:
-                self.set_stabilization(True)
-            self.__raw_motor = rawMotor(0, 0)
-            ToyUtil.set_raw_motor(self.__toy, RawMotorModes.OFF, 0, RawMotorModes.OFF, 0)
+        return stabilize
+
+    def __stop_raw_motor(self, stabilize: bool):
+        if stabilize:
+            self.set_stabilization(True)
+        self.__raw_motor = rawMotor(0, 0)
+        ToyUtil.set_raw_motor(self.__toy, RawMotorModes.OFF, 0, RawMotorModes.OFF, 0)
 
     def reset_aim(self):
         """Resets the heading calibration (aim) angle to use the current direction of the robot as 0°."""
@@ -292,6 +411,14 @@ class SpheroEduAPI:
             while self.__compass_zero is None:
                 time.sleep(0.1)
 
+    async def calibrate_compass_async(self):
+        """Like :func:`calibrate_compass`, without blocking the event loop."""
+        if isinstance(self.__toy, BOLT):
+            self.__compass_zero = None
+            ToyUtil.calibrate_compass(self.__toy)
+            while self.__compass_zero is None:
+                await asyncio.sleep(0.1)
+
     def set_compass_direction(self, direction:int):
         """
         Sets the direction relative to compass zero
@@ -388,16 +515,29 @@ class SpheroEduAPI:
         to_color = bound_color(to_color, self.__leds['main'])
 
         start = time.time()
-        while True:
-            frac = (time.time() - start) / duration
-            if frac >= 1:
-                break
-            self.set_main_led(Color(
-                r=round(from_color.r * (1 - frac) + to_color.r * frac),
-                g=round(from_color.g * (1 - frac) + to_color.g * frac),
-                b=round(from_color.b * (1 - frac) + to_color.b * frac)))
+        while self.__fade_step(from_color, to_color, (time.time() - start) / duration):
+            pass
+        self.set_main_led(to_color)
+
+    async def fade_async(self, from_color: Color, to_color: Color, duration: float):
+        """Like :func:`fade`, without blocking the event loop."""
+        from_color = bound_color(from_color, self.__leds['main'])
+        to_color = bound_color(to_color, self.__leds['main'])
+
+        start = time.time()
+        while self.__fade_step(from_color, to_color, (time.time() - start) / duration):
+            await self.__step()
         self.set_main_led(to_color)
 
+    def __fade_step(self, from_color: Color, to_color: Color, frac: float) -> bool:
+        if frac >= 1:
+            return False
+        self.set_main_led(Color(
+            r=round(from_color.r * (1 - frac) + to_color.r * frac),
+            g=round(from_color.g * (1 - frac) + to_color.g * frac),
+            b=round(from_color.b * (1 - frac) + to_color.b * frac)))
+        return True
+
     def strobe(self, color: Color, period: float, count: int):
         """Repeatedly blinks the main LED lights. The period is the time, in seconds, the light stays on during a
         single blink; cycles is the total number of blinks. The time for a single cycle is twice the period
@@ -405,12 +545,15 @@ class SpheroEduAPI:
         is 1/2 the time it takes for a single cycle. So, to strobe red 15 times in 3 seconds, use:
         ``strobe(Color(255, 57, 66), (3 / 15) * .5, 15)``."""
         for i in range(count * 2):
-            if i & 1:
-                self.set_main_led(color)
-            else:
-                self.set_main_led(Color(0, 0, 0))
+            self.set_main_led(color if i & 1 else Color(0, 0, 0))
             time.sleep(period)
 
+    async def strobe_async(self, color: Color, period: float, count: int):
+        """Like :func:`strobe`, without blocking the event loop."""
+        for i in range(count * 2):
+            self.set_main_led(color if i & 1 else Color(0, 0, 0))
+            await asyncio.sleep(period)
+
     def register_matrix_animation(self, frames:List[List[List[int]]], palette:List[Color], fps:int, transition:bool):
         """
         Registers a matrix animation
@@ -622,28 +765,34 @@ class SpheroEduAPI:
             sensors = ["accel_one", 'accelerometer', 'ambient_light', 'attitude', "core_time", 'gyroscope', 'locator', "quaternion", 'velocity']
         else:
             sensors = ['attitude', 'accelerometer', 'gyroscope', 'locator', 'velocity']
+        if hasattr(self.__toy, 'sensor_control') and self.__history_control is None:
+            self.__history_control = self.__toy.sensor_control
+            self.__sensor_history.attach(self.__history_control)
         ToyUtil.enable_sensors(self.__toy, sensors)
 
-    def _sensor_data_listener(self, sensor_data: Dict[str, Dict[str, float]]):
-        for sensor, data in sensor_data.items():
-            if sensor in self.__sensor_name_mapping:
-                self.__sensor_data[self.__sensor_name_mapping[sensor]] = data
-            else:
-                self.__sensor_data[sensor] = data
-        if 'attitude' in self.__sensor_data and 'accelerometer' in self.__sensor_data:
-            att = self.__sensor_data['attitude']
-            r = euler2mat(*np.deg2rad((att['roll'], att['pitch'], att['yaw'])), axes='szxy')
-            acc = self.__sensor_data['accelerometer']
-            self.__sensor_data['vertical_accel'] = -np.matmul(np.linalg.inv(r), (acc['x'], -acc['z'], acc['y']))[1]
-            self.__process_falling(self.__sensor_data['vertical_accel'])
-        if 'locator' in self.__sensor_data:
-            cur_loc = self.__sensor_data['locator']
-            cur_loc = (cur_loc['x'], cur_loc['y'])
+    def __stop_capturing_sensor_data(self):
+        if self.__history_control is not None:
+            self.__sensor_history.detach(self.__history_control)
+            self.__history_control = None
+
+    @property
+    def sensor_history(self) -> SensorHistory:
+        """Recent samples of every streamed sensor component, as NumPy views, e.g.
+        ``sensor_history.column('accelerometer.x', 100)`` for the last 100 readings of the accelerometer's x axis."""
+        return self.__sensor_history
+
+    def _sensor_sample_listener(self, sample: SensorSample):
+        sensor = self.__sensor_name_mapping.get(sample.topic, sample.topic)
+        self.__sensor_data[sensor] = sample.data
+        if sensor == 'vertical_accel':
+            self.__process_falling(sample.data)
+        elif sensor == 'locator':
+            cur_loc = sample.data['x'], sample.data['y']
             self.__sensor_data['distance'] += math.hypot(cur_loc[0] - self.__last_location[0],
                                                          cur_loc[1] - self.__last_location[1])
             self.__last_location = cur_loc
-        if 'color_detection' in self.__sensor_data:
-            color = self.__sensor_data['color_detection']
+        elif sensor == 'color_detection':
+            color = sample.data
             index = color['index']
             if index != self.__sensor_data['color_index'] and index < 255 and color['confidence'] >= 0.71:
                 self.__sensor_data['color_index'] = index
@@ -776,6 +925,10 @@ class SpheroEduAPI:
         """similar to get_luminosity, however this is a more direct call to the sphero to get a value directly"""
         return ToyUtil.get_ambient_light_sensor_value(self.__toy)
 
+    async def get_luminosity_direct_async(self):
+        """Like :func:`get_luminosity_direct`, without blocking the event loop."""
+        return await self.__run_blocking(ToyUtil.get_ambient_light_sensor_value, self.__toy)
+
     def get_luminosity(self):
         """Provides the light intensity from 0 - 100,000 lux, where 0 lux is full darkness and 30,000-100,000 lux is
         direct sunlight. You may need to adjust a condition based on luminosity in different environments as light
@@ -899,14 +1052,15 @@ class SpheroEduAPI:
     # be called every time it occurs by default, unless you customize it.
     def __call_event_listener(self, event_type: EventType, *args, **kwargs):
         for f in self.__listeners[event_type]:
-            threading.Thread(target=f, args=(self, *args), kwargs=kwargs).start()
+            self.__toy.dispatcher.dispatch(f, self, *args, **kwargs)
 
     def register_event(self, event_type: EventType, listener: Callable[..., None]):
         """Registers the event type with listener. If listener is ``None`` then it removes all listeners of the
         specified event type.
 
-        **Note**: listeners will be called in a newly spawned thread, meaning the caller have to deal with concurrency
-        if needed. This library is thread-safe."""
+        **Note**: listeners will be called on the worker threads of the toy's dispatcher, meaning the caller have to
+        deal with concurrency if needed. Calls to the same listener never overlap and keep their order. This library
+        is thread-safe."""
         if event_type not in EventType:
             raise ValueError(f'Event type {event_type} does not exist')
         if listener:
@@ -0,0 +1,115 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from spherov2.dispatcher import OverflowPolicy
+
+
+class _Stream:
+    __slots__ = ('selection', 'indices', 'sums', 'count', 'next_time')
+
+    def __init__(self, selection, indices):
+        self.selection = selection
+        self.indices = indices
+        self.sums = [0.] * len(indices)
+        self.count = 0
+        self.next_time = float('-inf')
+
+
+class SensorSubscription:
+    """Subscription of a listener to some of the sensors streamed by a control, created by its ``subscribe``.
+
+    Samples are filtered as they are decoded, so the listener only gets dicts of the sensors it asked for, like sensor
+    data listeners, and only as often as it needs them: with ``max_rate``, at most one sample per ``1 / max_rate``
+    seconds is passed on, or the mean of the samples of that period with ``average``. Calls waiting for the listener
+    are queued by the dispatcher of the toy with ``policy`` and ``max_pending``, separately for each subscription, so
+    that a slow listener delays neither the toy nor other listeners. With the default
+    :attr:`OverflowPolicy.COALESCE_LATEST`, samples waiting for the listener are merged into a single call keeping the
+    latest data of each sensor, so that sensors streamed in separate packets are not lost to each other."""
+
+    def __init__(self, toy, listener: Callable[[Dict[str, Dict[str, float]]], None],
+                 sensors: Iterable[str] = (), max_rate: Optional[float] = None, average: bool = False,
+                 policy: OverflowPolicy = OverflowPolicy.COALESCE_LATEST, max_pending: int = 1):
+        self.listener = listener
+        self.__toy = toy
+        self.__dispatcher = None
+        self.__policy = policy
+        self.__max_pending = max_pending
+        self.__sensors = frozenset(sensors)
+        self.__period = 1 / max_rate if max_rate else 0.
+        self.__average = average
+        self.__streams: Dict[Tuple[str, ...], _Stream] = {}
+        self.__coalesce = policy == OverflowPolicy.COALESCE_LATEST
+        self.__pending: Optional[Dict[str, Dict[str, float]]] = None
+        self.__coalesced = 0
+        self.__lock = threading.Lock()
+        self.__current_dispatcher()
+
+    @property
+    def dropped(self) -> int:
+        """Number of samples the listener did not get because it was too slow."""
+        dispatcher = self.__dispatcher
+        dropped = dispatcher.dropped(self.__deliver) if hasattr(dispatcher, 'dropped') else 0
+        return self.__coalesced + dropped
+
+    def __current_dispatcher(self):
+        # The toy swaps dispatchers in and out of async with, the policy being set on each one the first time
+        dispatcher = self.__toy.dispatcher
+        if dispatcher is not self.__dispatcher:
+            self.__dispatcher = dispatcher
+            if hasattr(dispatcher, 'set_policy'):
+                dispatcher.set_policy(self.__deliver, self.__policy, self.__max_pending)
+        return dispatcher
+
+    def __deliver(self, data):
+        if data is None:
+            with self.__lock:
+                data, self.__pending = self.__pending, None
+        self.listener(data)
+
+    def __stream(self, columns: Tuple[str, ...]) -> _Stream:
+        selection: List[Tuple[str, List[Tuple[str, int]]]] = []
+        indices = []
+        for i, column in enumerate(columns):
+            sensor, component = column.split('.', 1)
+            if self.__sensors and sensor not in self.__sensors:
+                continue
+            if not selection or selection[-1][0] != sensor:
+                selection.append((sensor, []))
+            selection[-1][1].append((component, len(indices)))
+            indices.append(i)
+        return _Stream(selection, indices)
+
+    def feed(self, columns: Tuple[str, ...], values: List[float], host_time: float, device_time: Optional[float]):
+        """Called by the control with every decoded sample."""
+        with self.__lock:
+            stream = self.__streams.get(columns)
+            if stream is None:
+                stream = self.__streams[columns] = self.__stream(columns)
+            if not stream.indices:
+                return
+            if self.__average:
+                sums = stream.sums
+                for j, i in enumerate(stream.indices):
+                    sums[j] += values[i]
+                stream.count += 1
+                if host_time < stream.next_time:
+                    return
+                selected = [total / stream.count for total in sums]
+                stream.sums = [0.] * len(sums)
+                stream.count = 0
+            else:
+                if host_time < stream.next_time:
+                    return
+                selected = [values[i] for i in stream.indices]
+            # Keep the cadence of max_rate, unless samples stopped coming for longer than a period
+            next_time = stream.next_time + self.__period
+            stream.next_time = next_time if next_time > host_time else host_time + self.__period
+            data = {sensor: {component: selected[j] for component, j in components}
+                    for sensor, components in stream.selection}
+            if self.__coalesce:
+                if self.__pending is not None:
+                    self.__coalesced += sum(sensor in self.__pending for sensor in data)
+                    self.__pending.update(data)
+                    return
+                self.__pending, data = data, None
+        self.__current_dispatcher().dispatch(self.__deliver, data)
@@ -0,0 +1,21 @@
+# python3
+# Measures how many packet protocol v2 frames per second can be built and parsed, without any toy.
+
+import timeit
+
+from spherov2.controls.v2 import Packet
+
+# A typical sensor streaming notification and a drive command, both including bytes that have to be escaped
+requests = [
+    Packet(Packet.Flags.requests_response | Packet.Flags.is_activity, 0x16, 0x07, 0x42, None, None,
+           bytearray([0x80, 0x00, 0xb4, 0x00])),
+    Packet(Packet.Flags.has_source_id | Packet.Flags.has_target_id, 0x18, 0x3d, 0xff, 0x12, 0x01,
+           bytearray(range(0x80, 0xd9, 5))),
+]
+frames = [request.build() for request in requests]
+
+for name, statement in (('build', lambda: [request.build() for request in requests]),
+                        ('parse', lambda: [Packet.parse_response(frame) for frame in frames])):
+    number = 20000
+    seconds = min(timeit.repeat(statement, number=number, repeat=5))
+    print(f'{name}: {number * len(requests) / seconds:,.0f} frames/s')
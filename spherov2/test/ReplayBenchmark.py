@@ -0,0 +1,39 @@
+# python3
+# Records the sensor stream of a BOLT into a log, then measures how fast it can be decoded by replaying it.
+# Usage: ReplayBenchmark.py LOG [SECONDS]. An existing log is replayed without connecting to a toy, repeating the
+# commands of the recording so that their recorded responses resolve them.
+
+import os
+import sys
+import time
+
+from spherov2 import scanner
+from spherov2.adapter.replay_adapter import get_replay_adapter
+from spherov2.recorder import Recorder, RecordKind, read_log
+from spherov2.toy.bolt import BOLT
+
+path = sys.argv[1]
+sensors = 'accelerometer', 'gyroscope', 'attitude', 'locator', 'velocity'
+if not os.path.exists(path):
+    toy = scanner.find_BOLT()
+    with Recorder(path) as recorder:
+        toy.recorder = recorder
+        with toy:
+            toy.sensor_control.enable(*sensors)
+            time.sleep(float(sys.argv[2]) if len(sys.argv) > 2 else 10)
+            toy.sensor_control.disable_all()
+        toy.recorder = None
+
+notifications = sum(record.kind == RecordKind.NOTIFICATION for record in read_log(path))
+samples = []
+ReplayAdapter = get_replay_adapter(path, None)
+toy = BOLT(ReplayAdapter.scan_toy('Replay'), ReplayAdapter)
+toy.sensor_control.add_sensor_data_listener(samples.append)
+start = time.perf_counter()
+with toy:
+    toy.sensor_control.enable(*sensors)
+    toy.sensor_control.disable_all()
+    ReplayAdapter.finished.wait()
+    seconds = time.perf_counter() - start
+print(f'{notifications} notifications in {seconds:.3f}s: {notifications / seconds:,.0f} notifications/s, '
+      f'{len(samples)} samples')
@@ -0,0 +1,36 @@
+# python3
+# Compares the cost of the vertical acceleration derived from the attitude and accelerometer of a toy, as computed
+# before with a rotation matrix from transforms3d and its inverse, per sample in closed form, and vectorized.
+# Needs transforms3d, which spherov2 no longer depends on.
+
+import random
+import timeit
+
+import numpy as np
+from transforms3d.euler import euler2mat
+
+from spherov2.sensor_bus import vertical_acceleration, vertical_acceleration_batch
+
+
+def matrix_vertical_acceleration(attitude, accelerometer):
+    rotation = euler2mat(*np.deg2rad((attitude['roll'], attitude['pitch'], attitude['yaw'])), axes='szxy')
+    return -np.matmul(np.linalg.inv(rotation), (accelerometer['x'], -accelerometer['z'], accelerometer['y']))[1]
+
+
+n = 10000
+attitudes = [{'pitch': random.uniform(-90, 90), 'roll': random.uniform(-180, 180), 'yaw': random.uniform(-180, 180)}
+             for _ in range(n)]
+accelerometers = [{axis: random.uniform(-2, 2) for axis in 'xyz'} for _ in range(n)]
+attitude_batch = {key: np.array([a[key] for a in attitudes]) for key in ('pitch', 'roll', 'yaw')}
+accelerometer_batch = {axis: np.array([a[axis] for a in accelerometers]) for axis in 'xyz'}
+
+expected = np.array([matrix_vertical_acceleration(*sample) for sample in zip(attitudes, accelerometers)])
+assert np.allclose([vertical_acceleration(*sample) for sample in zip(attitudes, accelerometers)], expected)
+assert np.allclose(vertical_acceleration_batch(attitude_batch, accelerometer_batch), expected)
+
+for name, f in (
+        ('matrix inverse', lambda: [matrix_vertical_acceleration(*sample) for sample in zip(attitudes, accelerometers)]),
+        ('closed form', lambda: [vertical_acceleration(*sample) for sample in zip(attitudes, accelerometers)]),
+        ('vectorized', lambda: vertical_acceleration_batch(attitude_batch, accelerometer_batch))):
+    seconds = min(timeit.repeat(f, number=1, repeat=5))
+    print(f'{name:>14}: {seconds / n * 1e6:.3f}us/sample, {n / seconds:,.0f} samples/s')
@@ -1,13 +1,27 @@
+import asyncio
 import threading
 import time
 from collections import OrderedDict, defaultdict
 from concurrent import futures
 from functools import partial
-from queue import SimpleQueue
-from typing import NamedTuple, Callable
+from queue import Empty
+from typing import NamedTuple, Callable, Optional, Dict
 
+from spherov2.clock import DeviceClock
+from spherov2.commands.core import Core
+from spherov2.commands.drive import Drive
+from spherov2.commands.io import IO
+from spherov2.commands.power import Power
+from spherov2.commands.sensor import Sensor
+from spherov2.commands.sphero import Sphero
+from spherov2.controls import CommandExecuteError
 from spherov2.controls.v1 import Packet as PacketV1
 from spherov2.controls.v2 import Packet as PacketV2
+from spherov2.dispatcher import ListenerDispatcher, LoopDispatcher
+from spherov2.packet_queue import PacketQueue, Priority
+from spherov2.pacer import FixedPacer
+from spherov2.pending import PendingRequests, PendingStats
+from spherov2.sensor_bus import SensorBus
 from spherov2.types import ToyType
 
 
@@ -18,6 +32,63 @@ class ToySensor(NamedTuple):
     modifier: Callable[[float], float] = None
 
 
+# State commands whose latest value supersedes earlier unwritten ones, mapped to the number of leading data bytes
+# (such as LED masks) that belong to the coalescing key together with the device, command and target ids.
+_state_commands = {
+    (Drive._did, 1): 0,  # set_raw_motors
+    (Drive._did, 7): 0,  # drive_with_heading
+    (IO._did, 14): 2,  # set_all_leds_with_16_bit_mask
+    (IO._did, 26): 4,  # set_all_leds_with_32_bit_mask
+    (IO._did, 28): 1,  # set_all_leds_with_8_bit_mask
+    (Sphero._did, 32): 0,  # set_main_led
+    (Sphero._did, 48): 0,  # roll
+    (Sphero._did, 51): 0,  # set_raw_motors
+}
+
+_device_priorities = {
+    Drive._did: Priority.MOTION,
+    IO._did: Priority.BULK,
+    Sensor._did: Priority.CONFIG,
+}
+
+_command_priorities = {
+    (Core._did, 34): Priority.SAFETY,  # sleep
+    (Power._did, 1): Priority.SAFETY,  # sleep
+    (Sphero._did, 1): Priority.MOTION,  # set_heading
+    (Sphero._did, 2): Priority.MOTION,  # set_stabilization
+    (Sphero._did, 32): Priority.BULK,  # set_main_led
+    (Sphero._did, 33): Priority.BULK,  # set_back_led_brightness
+    (Sphero._did, 48): Priority.MOTION,  # roll
+    (Sphero._did, 51): Priority.MOTION,  # set_raw_motors
+}
+
+
+# Drive setpoints, which are superseded by a stop queued after them
+_motion_commands = {
+    (Drive._did, 1),  # set_raw_motors
+    (Drive._did, 7),  # drive_with_heading
+    (Sphero._did, 48),  # roll
+    (Sphero._did, 51),  # set_raw_motors
+}
+
+
+class _UnawaitedResponse:
+    """Response of a command written on the event loop by a toy in ``async with``, which cannot wait for it."""
+
+    __slots__ = ('__packet',)
+
+    def __init__(self, packet):
+        self.__packet = packet
+
+    def __getattr__(self, name):
+        raise RuntimeError(f'Cannot wait for the response to {self.__packet.did:#04x}:{self.__packet.cid:#04x} on the '
+                           f'event loop, use AsyncToy or the *_async helpers instead')
+
+
+_no_response = futures.Future()
+_no_response.set_result(None)
+
+
 class Toy:
     toy_type = ToyType('Robot', None, 'Sphero', .06)
     sensors = OrderedDict()
@@ -29,21 +100,64 @@ class Toy:
                   ('22bb746f-2bb2-7554-2d6f-726568705327', bytearray([7]))]
     _packet = PacketV1
     _require_target = False
+    _response_timeout = 10.0
 
-    def __init__(self, toy, adapter_cls):
+    def __init__(self, toy, adapter_cls, max_in_flight: Optional[int] = None, pacer=None,
+                 dispatcher: Optional[ListenerDispatcher] = None, coalesce: bool = False, no_ack: bool = False,
+                 batch_writes: bool = False, write_without_response: bool = False, recorder=None):
+        """:param max_in_flight: Number of commands allowed to await a response at the same time. Set to ``None`` to
+                                 pace the commands with the fixed ``cmd_safe_interval`` of the toy type instead.
+        :param pacer: Pacer deciding how long to wait between writes, such as :class:`spherov2.pacer.AdaptivePacer`.
+                      Defaults to the fixed ``cmd_safe_interval`` when there is no command window, and to no pacing
+                      otherwise.
+        :param dispatcher: Worker pool on which listeners of this toy and its controls are called.
+        :param coalesce: Whether state commands like driving or setting LEDs replace their predecessors that are not
+                         written yet, so that the toy always gets the freshest setpoint. These commands then return
+                         without waiting for their responses, reporting failures to :attr:`on_command_error`.
+        :param no_ack: Whether state commands are sent without asking for a response, except when they fail. Their
+                       failures are reported to :attr:`on_command_error` instead of the caller. Only supported by
+                       toys using packet protocol v2.
+        :param batch_writes: Whether consecutive queued packets are packed into a single write of up to the ``mtu``
+                             reported by the adapter, instead of writing each packet in chunks of 20 bytes.
+        :param write_without_response: Whether to write to the toy without waiting for GATT write confirmations.
+                                       The adapter must accept ``response=False`` in its ``write``.
+        :param recorder: :class:`spherov2.recorder.Recorder` logging the raw notifications and writes of the toy."""
         self.address = toy.address
         self.name = toy.name
 
         self.__adapter = None
         self.__adapter_cls = adapter_cls
+        self.__loop = None
+        self.__writer = None
         self._packet_manager = self._packet.Manager()
         self.__decoder = self._packet.Collector(self.__new_packet)
-        self.__waiting = defaultdict(SimpleQueue)
+        self.__pending = PendingRequests(self._response_timeout)
         self.__listeners = defaultdict(dict)
         self._sensor_controller = None
+        self.clock = DeviceClock()
+        self.sensor_bus = SensorBus(self)
+        self.dispatcher = dispatcher or ListenerDispatcher()
 
         self.__thread = None
-        self.__packet_queue = SimpleQueue()
+        self.__packet_queue = PacketQueue()
+        self.coalesce = coalesce
+        self.no_ack = no_ack
+        self.batch_writes = batch_writes
+        self.write_without_response = write_without_response
+        self.on_command_error: Optional[Callable] = None
+        self.recorder = recorder
+        self.__unacknowledged = {}
+
+        # Number of times the toy was connected, telling controls whether what they last sent is still in effect
+        self._connections = 0
+
+        self.__max_in_flight = None
+        self.max_in_flight = max_in_flight
+        self.__in_flight = {}
+        self.__window = threading.Condition()
+        if pacer is None and max_in_flight is None:
+            pacer = FixedPacer(self.toy_type.cmd_safe_interval)
+        self.pacer = pacer
 
     def __repr__(self):
         return f'{self.name} ({self.address})'
@@ -52,9 +166,11 @@ class Toy:
         if self.__adapter is not None:
             raise RuntimeError('Toy already in context manager')
         self.__adapter = self.__adapter_cls(self.address)
+        self._connections += 1
         self.__thread = threading.Thread(target=self.__process_packet)
         try:
             for uuid, data in self._handshake:
+                self.__record_write(uuid, data)
                 self.__adapter.write(uuid, data)
             self.__adapter.set_callback(self._response_uuid, self.__api_read)
             self.__thread.start()
@@ -66,53 +182,352 @@ class Toy:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.__adapter.close()
         self.__adapter = None
+        with self.__window:
+            self.__window.notify_all()
         if self.__thread.is_alive():
-            self.__packet_queue.put(None)
+            self.__packet_queue.put(None, Priority.SAFETY)
             self.__thread.join()
-        self.__packet_queue = SimpleQueue()
+        self.__packet_queue = PacketQueue()
+        self.__in_flight.clear()
+
+    async def __aenter__(self):
+        if self.__adapter is not None:
+            raise RuntimeError('Toy already in context manager')
+        adapter_cls = getattr(self.__adapter_cls, 'async_adapter', None)
+        if adapter_cls is None:
+            raise RuntimeError(f'{self.__adapter_cls.__name__} does not support asyncio')
+        self.__loop = asyncio.get_running_loop()
+        self.__wakeup = asyncio.Event()
+        self.__window_ready = asyncio.Event()
+        self.__sync_dispatcher, self.dispatcher = self.dispatcher, LoopDispatcher(self.__loop)
+        self.__adapter = adapter_cls(self.address)
+        self._connections += 1
+        try:
+            await self.__adapter.connect()
+            for uuid, data in self._handshake:
+                self.__record_write(uuid, data)
+                await self.__adapter.write(uuid, data)
+            await self.__adapter.set_callback(self._response_uuid, self.__api_read)
+        except:
+            await self.__aexit__(None, None, None)
+            raise
+        self.__writer = self.__loop.create_task(self.__process_packet_async())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        writer, self.__writer = self.__writer, None
+        if writer is not None:
+            # Queued behind everything else, so that pending commands (like going to sleep) are written first
+            self.__packet_queue.put(None, Priority.BULK)
+            self.__wakeup.set()
+            try:
+                await asyncio.wait_for(writer, self._response_timeout)
+            except asyncio.TimeoutError:
+                pass
+        adapter, self.__adapter = self.__adapter, None
+        try:
+            await adapter.close()
+        finally:
+            self.dispatcher = self.__sync_dispatcher
+            self.__loop = None
+            self.__packet_queue = PacketQueue()
+            self.__in_flight.clear()
+
+    @property
+    def max_in_flight(self) -> Optional[int]:
+        """Size of the command window, or ``None`` if commands are paced with a fixed interval."""
+        return self.__max_in_flight
+
+    @max_in_flight.setter
+    def max_in_flight(self, value: Optional[int]):
+        if self.__adapter is not None:
+            raise RuntimeError('Cannot change the command window while the toy is connected')
+        if value is not None and not 0 < value < 0xff:
+            raise ValueError(f'Command window size {value} is out of range')
+        self.__max_in_flight = value
 
     def __process_packet(self):
+        carried = None
         while self.__adapter is not None:
-            payload = self.__packet_queue.get()
-            if payload is None:
+            if carried is None:
+                packet = self.__packet_queue.get()
+                if packet is None:
+                    break
+                payload = packet.build()
+            else:
+                packet, payload = carried
+                carried = None
+            if not self.__admit(packet, True):
                 break
+            pacer = self.pacer
+            if pacer is not None:
+                pacer.wait(packet.id)
+            adapter = self.__adapter
+            if adapter is None:
+                break
+            batch = [packet]
+            size = 20
+            stopping = False
+            if self.batch_writes:
+                size = getattr(adapter, 'mtu', size)
+                batch, payload, carried, stopping = self.__fill_batch(packet, payload, size)
             # print('request ' + ' '.join([hex(c) for c in payload]))
-            while payload:
-                self.__adapter.write(self._send_uuid, payload[:20])
-                payload = payload[20:]
-            time.sleep(self.toy_type.cmd_safe_interval)
+            for i in range(0, len(payload), size):
+                self.__record_write(self._send_uuid, payload[i:i + size])
+                if self.write_without_response:
+                    adapter.write(self._send_uuid, payload[i:i + size], response=False)
+                else:
+                    adapter.write(self._send_uuid, payload[i:i + size])
+            if pacer is not None:
+                for sent in batch:
+                    pacer.on_sent(sent.id)
+            if stopping:
+                break
 
-    def _execute(self, packet):
+    async def __process_packet_async(self):
+        carried = None
+        while True:
+            if carried is None:
+                try:
+                    packet = self.__packet_queue.get(False)
+                except Empty:
+                    self.__wakeup.clear()
+                    await self.__wakeup.wait()
+                    continue
+                if packet is None:
+                    break
+                payload = packet.build()
+            else:
+                packet, payload = carried
+                carried = None
+            while not self.__admit(packet, False):
+                self.__window_ready.clear()
+                with self.__window:
+                    timeout = min(self.__in_flight.values(), default=0.) - time.monotonic()
+                try:
+                    await asyncio.wait_for(self.__window_ready.wait(), max(timeout, 0.))
+                except asyncio.TimeoutError:
+                    pass
+            pacer = self.pacer
+            if pacer is not None:
+                await asyncio.sleep(pacer.delay())
+                pacer.wait(packet.id)
+            adapter = self.__adapter
+            size = 20
+            stopping = False
+            batch = [packet]
+            if self.batch_writes:
+                size = getattr(adapter, 'mtu', size)
+                batch, payload, carried, stopping = self.__fill_batch(packet, payload, size)
+            for i in range(0, len(payload), size):
+                self.__record_write(self._send_uuid, payload[i:i + size])
+                if self.write_without_response:
+                    await adapter.write(self._send_uuid, payload[i:i + size], response=False)
+                else:
+                    await adapter.write(self._send_uuid, payload[i:i + size])
+            if pacer is not None:
+                for sent in batch:
+                    pacer.on_sent(sent.id)
+            if stopping:
+                break
+
+    def __fill_batch(self, packet, payload, size):
+        batch = [packet]
+        while len(payload) < size:
+            try:
+                following = self.__packet_queue.get(False)
+            except Empty:
+                break
+            if following is None:
+                return batch, payload, None, True
+            frame = following.build()
+            if len(payload) + len(frame) > size or not self.__admit(following, False):
+                return batch, payload, (following, frame), False
+            if self.pacer is not None:
+                self.pacer.wait(following.id)
+            batch.append(following)
+            payload += frame
+        return batch, payload, None, False
+
+    def __admit(self, packet, block) -> bool:
+        if self.__max_in_flight is None or not self._expects_response(packet):
+            return True
+        return self.__acquire_window(packet.id, block)
+
+    def __acquire_window(self, key, block=True) -> bool:
+        with self.__window:
+            while len(self.__in_flight) >= self.__max_in_flight:
+                now = time.monotonic()
+                expired = [k for k, deadline in self.__in_flight.items() if deadline <= now]
+                for k in expired:
+                    del self.__in_flight[k]
+                if expired:
+                    continue
+                if self.__adapter is None or not block:
+                    return False
+                self.__window.wait(min(self.__in_flight.values()) - now)
+            self.__in_flight[key] = time.monotonic() + self._response_timeout
+        return True
+
+    def __release_window(self, key):
+        with self.__window:
+            if self.__in_flight.pop(key, None) is not None:
+                self.__window.notify()
+                if self.__loop is not None:
+                    self.__loop.call_soon_threadsafe(self.__window_ready.set)
+
+    def _submit(self, packet) -> futures.Future:
+        """Queues the packet for writing without blocking, returning a future that resolves to its response."""
         if self.__adapter is None:
             raise RuntimeError('Use toys in context manager')
-        self.__packet_queue.put(packet.build())
-        return self._wait_packet(packet.id)
+        if self.no_ack and (packet.did, packet.cid) in _state_commands:
+            packet = self._without_response(packet)
+        self.__expire_unacknowledged()
+        # The key now belongs to this request, whose response must not be taken for an error of an earlier one
+        self.__unacknowledged.pop(packet.id, None)
+        if self._expects_response(packet):
+            future = self.__pending.add(packet.id)
+        else:
+            future = _no_response
+            self.__unacknowledged[packet.id] = packet, time.monotonic() + self._response_timeout
+        priority = self._priority(packet)
+        supersedes = None
+        if priority == Priority.SAFETY and (packet.did, packet.cid) in _motion_commands:
+            # The stop jumps ahead of setpoints still waiting, which must not be written after it
+            supersedes = self._is_motion_command
+        for replaced in self.__packet_queue.put(packet, priority,
+                                                self._coalescing_key(packet) if self.coalesce else None, supersedes):
+            self.__unacknowledged.pop(replaced.id, None)
+            self.__pending.transfer(replaced.id, None if future is _no_response else packet.id)
+        if self.__loop is not None:
+            self.__loop.call_soon_threadsafe(self.__wakeup.set)
+        return future
+
+    def __expire_unacknowledged(self):
+        """Forgets the commands sent without response that did not fail within the response timeout."""
+        unacknowledged, now = self.__unacknowledged, time.monotonic()
+        while unacknowledged:
+            key = next(iter(unacknowledged))
+            if unacknowledged[key][1] > now:
+                break
+            unacknowledged.pop(key, None)
+
+    def _expects_response(self, packet) -> bool:
+        return True
+
+    def _without_response(self, packet):
+        return packet
+
+    @property
+    def decode_errors(self) -> Dict[str, int]:
+        """Number of corrupt received packets that were skipped, by reason."""
+        return dict(self.__decoder.errors)
+
+    @property
+    def pending_stats(self) -> PendingStats:
+        """Requests waiting for a response, and how many were resolved, timed out or answered too late."""
+        return self.__pending.stats()
+
+    @property
+    def queue_stats(self):
+        """Wait time statistics of each priority lane of the outgoing queue."""
+        return self.__packet_queue.stats()
 
-    def _wait_packet(self, key, timeout=10.0, check_error=False):
-        future = futures.Future()
-        self.__waiting[key].put(future)
-        packet = future.result(timeout)
+    def _priority(self, packet) -> Priority:
+        did, cid, data = packet.did, packet.cid, packet.data
+        if (did, cid) in ((Drive._did, 7), (Sphero._did, 48)):  # drive_with_heading, roll
+            if data[0] == 0:
+                return Priority.SAFETY
+        elif (did, cid) in ((Drive._did, 1), (Sphero._did, 51)):  # set_raw_motors
+            if (data[0] == 0 or data[1] == 0) and (data[2] == 0 or data[3] == 0):
+                return Priority.SAFETY
+        return _command_priorities.get((did, cid), _device_priorities.get(did, Priority.CONFIG))
+
+    @staticmethod
+    def _is_motion_command(packet) -> bool:
+        return packet is not None and (packet.did, packet.cid) in _motion_commands
+
+    def _coalescing_key(self, packet):
+        size = _state_commands.get((packet.did, packet.cid))
+        if size is None:
+            return None
+        return packet.did, packet.cid, bytes(packet.data[:size])
+
+    def _execute(self, packet):
+        """Writes the packet and waits for its response. Within ``async with``, commands called on the event loop are
+        written without blocking it, returning a stand-in for the response that raises :class:`RuntimeError` when read;
+        use :class:`spherov2.async_toy.AsyncToy` to await results."""
+        future = self._submit(packet)
+        if self.coalesce and (packet.did, packet.cid) in _state_commands:
+            # Not waiting lets the next setpoint of loops like fades replace this one while it is still queued
+            future.add_done_callback(partial(self.__check_state_response, packet))
+            return None
+        if self.__loop is not None and self.__on_loop():
+            return _UnawaitedResponse(packet)
+        return future.result(self._response_timeout)
+
+    def __check_state_response(self, request, future: futures.Future):
+        if future.cancelled() or future.exception() is not None or future.result() is None:
+            return
+        try:
+            future.result().check_error()
+        except CommandExecuteError:
+            if self.on_command_error is not None:
+                self.dispatcher.dispatch(self.on_command_error, request, future.result())
+
+    def __on_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.__loop
+        except RuntimeError:
+            return False
+
+    def _expect(self, key, timeout=None) -> futures.Future:
+        """Returns a future resolving to the next packet received with the key."""
+        return self.__pending.add(key, timeout, request=False)
+
+    def _wait_packet(self, key, timeout=None, check_error=False):
+        if self.__loop is not None:
+            raise RuntimeError('Cannot wait for packets on the event loop, use AsyncToy instead')
+        packet = self._expect(key, timeout).result(self._response_timeout if timeout is None else timeout)
         if check_error:
             packet.check_error()
         return packet
 
+    def _write(self, uuid, data):
+        """Writes raw data to a characteristic of the toy, bypassing the packet queue."""
+        self.__record_write(uuid, data)
+        if self.__loop is not None:
+            return asyncio.ensure_future(self.__adapter.write(uuid, data))
+        self.__adapter.write(uuid, data)
+
     def _add_listener(self, key, listener: Callable):
         self.__listeners[key[0]][listener] = partial(key[1], listener)
 
     def _remove_listener(self, key, listener: Callable):
         self.__listeners[key[0]].pop(listener)
 
+    def __record_write(self, uuid, data):
+        if self.recorder is not None:
+            self.recorder.write(uuid, data)
+
     def __api_read(self, char, data):
+        if self.recorder is not None:
+            self.recorder.notification(self._response_uuid, data)
         self.__decoder.add(data)
 
     def __new_packet(self, packet):
         # print('response ' + ' '.join([hex(c) for c in packet.build()]))
         key = packet.id
-        queue = self.__waiting[key]
-        while not queue.empty():
-            queue.get().set_result(packet)
-        for f in self.__listeners[key].values():
-            threading.Thread(target=f, args=(packet,)).start()
+        if self.pacer is not None:
+            self.pacer.on_response(key, packet)
+        if self.__max_in_flight is not None:
+            self.__release_window(key)
+        unacknowledged = self.__unacknowledged.pop(key, None)
+        if unacknowledged is not None and packet.err != PacketV2.Error.success and self.on_command_error is not None:
+            self.dispatcher.dispatch(self.on_command_error, unacknowledged[0], packet)
+        self.__pending.resolve(key, packet)
+        for f in list(self.__listeners[key].values()):
+            self.dispatcher.dispatch(f, packet)
 
     @classmethod
     def implements(cls, method, with_target=False):
@@ -130,6 +545,16 @@ class ToyV2(Toy):
     _packet = PacketV2
     _handshake = []
 
+    def _coalescing_key(self, packet):
+        key = super()._coalescing_key(packet)
+        return key and (*key, packet.tid)
+
+    def _expects_response(self, packet) -> bool:
+        return bool(packet.flags & PacketV2.Flags.requests_response)
+
+    def _without_response(self, packet):
+        return packet.without_response()
+
     _response_uuid = _send_uuid = '00010002-574f-4f20-5370-6865726f2121' #Original
     #_response_uuid = '22bb746f-2ba6-7554-2d6f-726568705327'
     #_send_uuid =     '22bb746f-2ba1-7554-2d6f-726568705327'
@@ -55,7 +55,7 @@ class Sphero(Toy):
     )
 
     def wake(self):
-        self._Toy__adapter.write('22bb746f-2bbf-7554-2d6f-726568705327', bytearray([1]))
+        return self._write('22bb746f-2bbf-7554-2d6f-726568705327', bytearray([1]))
 
     # Async
     add_battery_state_changed_notify_listener = partialmethod(Toy._add_listener,
@@ -1,3 +1,4 @@
+import time
 from enum import IntEnum
 from typing import Callable, Dict, List, Iterable
 
@@ -9,6 +10,7 @@ from spherov2.commands.power import Power
 from spherov2.commands.sensor import CollisionDetectionMethods, Sensor, SensitivityBasedCollisionDetectionMethods, \
     SensitivityLevels
 from spherov2.commands.sphero import CollisionDetectionMethods as SpheroCollisionDetectionMethods, Sphero
+from spherov2.commands.system_info import SystemInfo
 from spherov2.controls import RawMotorModes
 from spherov2.controls.v2 import Processors
 from spherov2.toy import Toy
@@ -477,6 +479,16 @@ class ToyUtil:
         elif not_supported_handler:
             not_supported_handler()
 
+    @staticmethod
+    def synchronize_clock(toy: Toy, not_supported_handler: Callable[[], None] = None):
+        """Asks the toy for its uptime once, refining the estimate of its clock used to timestamp sensor samples."""
+        if toy.implements(SystemInfo.get_core_up_time_in_milliseconds):
+            sent = time.monotonic()
+            uptime = toy.get_core_up_time_in_milliseconds()
+            toy.clock.add_exchange(uptime / 1000, sent, time.monotonic())
+        elif not_supported_handler:
+            not_supported_handler()
+
     @staticmethod
     def enable_sensors(toy: Toy, sensors: List[str], not_supported_handler: Callable[[], None] = None):
         if hasattr(toy, 'sensor_control'):
@@ -499,6 +511,8 @@ class ToyUtil:
     def add_listeners(toy: Toy, manager):
         if hasattr(toy, 'sensor_control') and hasattr(manager, '_sensor_data_listener'):
             toy.sensor_control.add_sensor_data_listener(manager._sensor_data_listener)
+        if hasattr(manager, '_sensor_sample_listener'):
+            toy.sensor_bus.subscribe(manager._sensor_sample_listener)
         if hasattr(toy, 'add_collision_detected_notify_listener') and hasattr(manager, '_collision_detected_notify'):
             toy.add_collision_detected_notify_listener(manager._collision_detected_notify)
         if hasattr(toy, 'add_battery_state_changed_notify_listener') and \